@@ -0,0 +1,240 @@
+from PyQt5.QtCore import QObject, pyqtSignal
+
+
+class PlaybackBackend(QObject):
+    # same values as QMediaPlayer.State and QMediaPlayer.MediaStatus
+    StoppedState, PlayingState, PausedState = range(3)
+    (UnknownMediaStatus, NoMedia, LoadingMedia, LoadedMedia, StalledMedia, BufferingMedia, BufferedMedia,
+     EndOfMedia, InvalidMedia) = range(9)
+
+    audioAvailableChanged = pyqtSignal(bool)
+    currentMediaChanged = pyqtSignal(str)
+    durationChanged = pyqtSignal("qint64")
+    mutedChanged = pyqtSignal(bool)
+    positionChanged = pyqtSignal("qint64")
+    seekableChanged = pyqtSignal(bool)
+    stateChanged = pyqtSignal(int)
+    volumeChanged = pyqtSignal(int)
+    mediaStatusChanged = pyqtSignal(int)
+    error = pyqtSignal(int)
+    # the preloaded track took over from the current one
+    trackSwitched = pyqtSignal()
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        # crossfade length in ms, 0 switches at the end of the track
+        self.crossfade = 0
+
+    def setMedia(self, url):
+        raise NotImplementedError
+
+    def currentUrl(self):
+        raise NotImplementedError
+
+    def play(self):
+        raise NotImplementedError
+
+    def pause(self):
+        raise NotImplementedError
+
+    def stop(self):
+        raise NotImplementedError
+
+    def state(self):
+        raise NotImplementedError
+
+    def position(self):
+        raise NotImplementedError
+
+    def setPosition(self, position):
+        raise NotImplementedError
+
+    def duration(self):
+        raise NotImplementedError
+
+    def volume(self):
+        raise NotImplementedError
+
+    def setVolume(self, volume):
+        raise NotImplementedError
+
+    def isMuted(self):
+        raise NotImplementedError
+
+    def setMuted(self, muted):
+        raise NotImplementedError
+
+    def notifyInterval(self):
+        raise NotImplementedError
+
+    def setNotifyInterval(self, interval):
+        raise NotImplementedError
+
+    def setCrossfade(self, crossfade):
+        self.crossfade = max(0, crossfade)
+
+    def preload(self, url):
+        # opens the next track so it can start without a gap
+        raise NotImplementedError
+
+    def cancelPreload(self):
+        raise NotImplementedError
+
+    def availableMetaData(self):
+        return []
+
+    def metaData(self, key):
+        return None
+
+
+class FakeBackend(PlaybackBackend):
+    # plays nothing, time only moves through advance(), so every run is the same
+    def __init__(self, durations=None, defaultDuration=180000, parent=None):
+        super().__init__(parent)
+        self.durations = durations or {}
+        self.defaultDuration = defaultDuration
+        self.url = None
+        self.preloaded = None
+        self.currentState = self.StoppedState
+        self.status = self.NoMedia
+        self.currentPosition = 0
+        self.currentDuration = 0
+        self.baseVolume = 100
+        self.muted = False
+        self.interval = 1000
+        self.sinceNotify = 0
+        # simulated ms played so far
+        self.clock = 0
+
+    def setMedia(self, url):
+        self.cancelPreload()
+        if self.currentState != self.StoppedState:
+            self.__setState(self.StoppedState)
+
+        self.url = url or None
+        self.currentPosition = 0
+        self.sinceNotify = 0
+        self.currentDuration = self.durations.get(url, self.defaultDuration) if self.url else 0
+        self.currentMediaChanged.emit(url or "")
+        self.durationChanged.emit(self.currentDuration)
+        if self.url is None:
+            self.__setStatus(self.NoMedia)
+            return
+
+        self.__setStatus(self.LoadingMedia)
+        self.__setStatus(self.LoadedMedia)
+        self.seekableChanged.emit(True)
+        self.audioAvailableChanged.emit(True)
+
+    def currentUrl(self):
+        return self.url or ""
+
+    def play(self):
+        if self.url is None or self.currentState == self.PlayingState:
+            return
+
+        if self.status == self.EndOfMedia:
+            self.currentPosition = 0
+            self.sinceNotify = 0
+        self.__setState(self.PlayingState)
+        self.__setStatus(self.BufferedMedia)
+
+    def pause(self):
+        if self.url is not None and self.currentState != self.PausedState:
+            self.__setState(self.PausedState)
+
+    def stop(self):
+        if self.currentState != self.StoppedState:
+            self.currentPosition = 0
+            self.__setState(self.StoppedState)
+            self.__setStatus(self.LoadedMedia)
+            self.positionChanged.emit(0)
+
+    def state(self):
+        return self.currentState
+
+    def position(self):
+        return self.currentPosition
+
+    def setPosition(self, position):
+        self.currentPosition = max(0, min(position, self.currentDuration))
+        self.positionChanged.emit(self.currentPosition)
+
+    def duration(self):
+        return self.currentDuration
+
+    def volume(self):
+        return self.baseVolume
+
+    def setVolume(self, volume):
+        if volume != self.baseVolume:
+            self.baseVolume = volume
+            self.volumeChanged.emit(volume)
+
+    def isMuted(self):
+        return self.muted
+
+    def setMuted(self, muted):
+        if muted != self.muted:
+            self.muted = muted
+            self.mutedChanged.emit(muted)
+
+    def notifyInterval(self):
+        return self.interval
+
+    def setNotifyInterval(self, interval):
+        # restarts the notify timer, as QMediaPlayer does
+        self.interval = interval
+        self.sinceNotify = 0
+
+    def preload(self, url):
+        self.preloaded = url
+
+    def cancelPreload(self):
+        self.preloaded = None
+
+    def availableMetaData(self):
+        return ["Duration"] if self.url is not None else []
+
+    def metaData(self, key):
+        return self.currentDuration if key == "Duration" and self.url is not None else None
+
+    def advance(self, ms):
+        # plays ms of simulated time, emitting the signals a real player would on the way
+        while ms > 0 and self.currentState == self.PlayingState:
+            end = self.currentDuration - (self.crossfade if self.preloaded is not None else 0)
+            step = min(ms, self.interval - self.sinceNotify, max(0, end - self.currentPosition))
+            self.currentPosition += step
+            self.sinceNotify += step
+            self.clock += step
+            ms -= step
+            if self.currentPosition >= end:
+                self.__finish()
+
+            elif self.sinceNotify >= self.interval:
+                self.sinceNotify = 0
+                self.positionChanged.emit(self.currentPosition)
+
+    def __finish(self):
+        if self.preloaded is not None:
+            # the preloaded track starts right away, like DualPlayer does
+            self.url, self.preloaded = self.preloaded, None
+            self.currentPosition = 0
+            self.sinceNotify = 0
+            self.currentDuration = self.durations.get(self.url, self.defaultDuration)
+            self.currentMediaChanged.emit(self.url)
+            self.durationChanged.emit(self.currentDuration)
+            self.trackSwitched.emit()
+            return
+
+        self.currentPosition = self.currentDuration
+        self.__setState(self.StoppedState)
+        self.__setStatus(self.EndOfMedia)
+
+    def __setState(self, state):
+        self.currentState = state
+        self.stateChanged.emit(state)
+
+    def __setStatus(self, status):
+        self.status = status
+        self.mediaStatusChanged.emit(status)
@@ -0,0 +1,781 @@
+import argparse
+import contextlib
+import gc
+import io
+import json
+import os
+import platform
+import random
+import shutil
+import struct
+import subprocess
+import sys
+import tempfile
+import time
+import wave
+from unittest import mock
+from pathlib import Path
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+from PyQt5.QtCore import QT_VERSION_STR, PYQT_VERSION_STR, QUrl, QPoint, QEvent, QEventLoop, QTimer, Qt
+from PyQt5.QtGui import QMouseEvent
+from PyQt5.QtWidgets import QApplication
+from playerwidget import PlayListModel, PlayListWidget, PlayerWidget
+from library import Library
+from metadata import Metadata, MetadataScanner
+from probe import probe
+from prefetch import Prefetcher
+from playlist import Track
+from playorder import PlayOrder, ShuffleOrder
+from throttle import Throttle
+from backend import FakeBackend, PlaybackBackend
+from settings import settings
+from iplayer import Window
+import settings as settingsModule
+
+
+def syntheticTracks(count):
+    return [Track(Path(tempfile.gettempdir(), "music", f"{i:07d} - track.mp3").as_uri()) for i in range(count)]
+
+
+libraryDirectory = None
+libraries = {}
+
+
+def syntheticLibrary(count):
+    # built once per size and shared between benchmarks, a million tracks take most of a minute
+    global libraryDirectory
+    if count not in libraries:
+        if libraryDirectory is None:
+            libraryDirectory = tempfile.TemporaryDirectory()
+        path = os.path.join(libraryDirectory.name, f"library-{count}.db")
+        library = Library(path)
+        library.addTracks(syntheticTracks(count))
+        library.close()
+        libraries[count] = path
+
+    return libraries[count]
+
+
+def benchLoadPlayList(count):
+    # Window start to the whole library in the playlist, through PlayListLoader and playListLoaded
+    with windowHome(count):
+        start = time.perf_counter()
+        window = loadWindow()
+        elapsed = time.perf_counter() - start
+
+        assert window.playListWidget.playListModel.rowCount() == count
+        closeWindow(window)
+
+    return elapsed
+
+
+def benchShuffle(count):
+    order = ShuffleOrder()
+    order.extend(count)
+
+    start = time.perf_counter()
+    order.enabled = True
+    order.shuffle(0)
+    visited = 0
+    index = 0
+    while index >= 0:
+        visited += 1
+        index = order.next(index)
+    elapsed = time.perf_counter() - start
+
+    assert visited == count
+    return elapsed
+
+
+def benchShufflePlayList(count):
+    # the shuffle button pressed twice, on with the order saved and off again
+    with windowHome(count, currentMusic=count // 2):
+        window = loadWindow()
+        start = time.perf_counter()
+        window.shufflePlayList()
+        window.shufflePlayList()
+        elapsed = time.perf_counter() - start
+
+        assert not window.playOrder.shuffle.enabled
+        closeWindow(window)
+
+    return elapsed
+
+
+def benchPlayOrder(count, steps=100000):
+    order = PlayOrder()
+    order.extend(count)
+    order.setShuffle(True)
+    order.setCurrent(0)
+
+    start = time.perf_counter()
+    for _ in range(steps):
+        order.next(True)
+    for _ in range(steps):
+        order.previous()
+    elapsed = time.perf_counter() - start
+
+    return elapsed / (2 * steps)
+
+
+def benchAddPlayList(count):
+    paths = [os.path.join(tempfile.gettempdir(), "music", f"{i:07d} - track.mp3") for i in range(count)]
+    widget = PlayListWidget(None)
+    widget.resize(420, 600)
+    widget.show()
+    order = PlayOrder()
+    QApplication.processEvents()
+
+    # the gui thread part of a drop: building the tracks, one model insert and one order extension
+    start = time.perf_counter()
+    tracks = [Track(QUrl.fromLocalFile(path).toString(), os.path.basename(path)) for path in paths]
+    widget.addTracks(tracks)
+    order.extend(len(tracks))
+    QApplication.processEvents()
+    elapsed = time.perf_counter() - start
+
+    widget.close()
+    assert widget.playListModel.rowCount() == count
+    return elapsed
+
+
+def benchDuplicates(count, duplicates=0.1):
+    tracks = syntheticTracks(count)
+    model = PlayListModel()
+    model.addTracks(tracks + tracks[:int(count * duplicates)])
+    order = PlayOrder()
+    order.extend(model.rowCount())
+    order.setShuffle(True)
+    model.pathIndex()
+
+    start = time.perf_counter()
+    unique = model.uniqueTracks(tracks[:1000])
+    check = (time.perf_counter() - start) / 1000
+
+    start = time.perf_counter()
+    mapping = model.removeDuplicates()
+    order.remap(mapping, model.rowCount())
+    elapsed = time.perf_counter() - start
+
+    assert not unique and model.rowCount() == count == len(order.shuffle)
+    return check, elapsed
+
+
+def settle():
+    # collects what the previous benchmarks left, then runs the deferred deletes this posts and the layout
+    # of the widgets just shown, all of which would otherwise land in the first timed events
+    gc.collect()
+    for _ in range(3):
+        QApplication.processEvents()
+
+
+def benchSearch(count, queries=("night rain", "0001234", "blue heart dream", "track", "artist 12", "xyz")):
+    words = ("love", "night", "song", "remix", "live", "dance", "blue", "heart", "rain", "fire", "dream", "road")
+    widget = PlayListWidget(None)
+    widget.resize(420, 600)
+    widget.show()
+    widget.addTracks(syntheticTracks(count))
+
+    start = time.perf_counter()
+    widget.filterModel.searchIndex.indexPending()
+    build = time.perf_counter() - start
+
+    # the tags come in afterwards from the metadata scan, which indexes every track a second time
+    tags = [(row, Metadata(title=" ".join(words[(row * k) % len(words)] for k in (1, 3, 7)),
+                           artist=f"Artist {row % 3000}", album=f"Album {row % 8000}")) for row in range(count)]
+    start = time.perf_counter()
+    for first in range(0, count, 256):
+        widget.playListModel.setMetadata(tags[first:first + 256])
+    widget.filterModel.searchIndex.indexPending()
+    retag = time.perf_counter() - start
+    settle()
+
+    # every prefix of every query is one keystroke, timed up to the repaint
+    times = []
+    for query in queries:
+        for end in range(1, len(query) + 1):
+            start = time.perf_counter()
+            widget.setFilter(query[:end])
+            QApplication.processEvents()
+            times.append(time.perf_counter() - start)
+        widget.setFilter("")
+
+    widget.close()
+    return build, retag, sum(times) / len(times), max(times)
+
+
+def benchSort(count, field="name"):
+    tracks = syntheticTracks(count)
+    random.shuffle(tracks)
+    widget = PlayListWidget(None)
+    widget.resize(420, 600)
+    widget.show()
+    widget.addTracks(tracks)
+    order = PlayOrder()
+    order.extend(count)
+    times = []
+    # the first sort computes the keys, the second one reuses them
+    for descending in (False, True):
+        start = time.perf_counter()
+        order.remap(widget.playListModel.sortBy(field, descending), count)
+        QApplication.processEvents()
+        times.append(time.perf_counter() - start)
+
+    widget.close()
+    return times
+
+
+def benchHighlight(count, steps=200):
+    widget = PlayListWidget(None)
+    widget.resize(420, 600)
+    widget.show()
+    widget.addTracks(syntheticTracks(count))
+    QApplication.processEvents()
+
+    # moving the now playing row between visible rows, up to the repaint
+    start = time.perf_counter()
+    for step in range(steps):
+        widget.setCurrentRow(step % 20)
+        QApplication.processEvents()
+    elapsed = time.perf_counter() - start
+
+    widget.close()
+    return elapsed / steps
+
+
+def benchCloseEvent(count):
+    # closing with the order timer running and a position change not written yet
+    url = syntheticTracks(1)[0].url
+    backend = FakeBackend({url: 3600000})
+    with windowHome(count, shuffle=True):
+        window = loadWindow(backend)
+        window.play()
+        backend.advance(60000)
+        window.orderTimer.start()
+
+        start = time.perf_counter()
+        closeWindow(window)
+        elapsed = time.perf_counter() - start
+
+    return elapsed
+
+
+def peakRss():
+    # in KiB, None where neither source is available; ru_maxrss is kept across exec on Linux,
+    # so a child process would report the peak of the benchmark process that started it
+    try:
+        with open("/proc/self/status") as file:
+            for line in file:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1])
+
+    except OSError:
+        pass
+
+    try:
+        import resource
+
+    except ImportError:
+        return None
+
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+
+def startup(spawned):
+    # runs in a fresh interpreter with HOME set up by benchStartup, spawned is the time.time() of the parent starting it
+    app = QApplication(sys.argv[:1])
+    window = Window(FakeBackend())
+    window.show()
+    times = {}
+
+    while window.playListLoading:
+        QApplication.processEvents()
+        if "firstBatch" not in times and window.playListWidget.playListModel.rowCount():
+            QApplication.processEvents()
+            times["firstBatch"] = time.time() - spawned
+
+    times["loaded"] = time.time() - spawned
+    times["peakRssKb"] = peakRss()
+    closeWindow(window)
+    print(json.dumps(times))
+
+
+def benchStartup(count):
+    # time to the first painted batch and to the whole playlist, and peak RSS, in a new process
+    with windowHome(count):
+        spawned = time.time()
+        output = subprocess.run([sys.executable, os.path.abspath(__file__), "--startup", repr(spawned)],
+                                stdout=subprocess.PIPE, check=True).stdout
+
+    return json.loads(output.decode().splitlines()[-1])
+
+
+def benchSeekDrag(moves=200, interval=0.005, latency=80):
+    widget = PlayerWidget(None)
+    widget.resize(420, 120)
+    widget.show()
+    widget.setDuration(600000)
+    QApplication.processEvents()
+
+    # a seek takes latency ms to land, like a network file would
+    seeks = []
+    def seek(position):
+        seeks.append(position)
+        QTimer.singleShot(latency, throttle.release)
+
+    throttle = Throttle(seek, 250)
+    widget.musicPositionMoved.connect(throttle.request)
+    slider = widget.musicSlider
+
+    def send(type, x):
+        position = QPoint(x, slider.height() // 2)
+        QApplication.sendEvent(slider, QMouseEvent(type, position, Qt.LeftButton, Qt.LeftButton, Qt.NoModifier))
+
+    # dragging from the left to the right end of the bar
+    send(QEvent.MouseButtonPress, 0)
+    for move in range(1, moves + 1):
+        send(QEvent.MouseMove, move * (slider.width() - 1) // moves)
+        deadline = time.perf_counter() + interval
+        while time.perf_counter() < deadline:
+            QApplication.processEvents()
+    send(QEvent.MouseButtonRelease, slider.width() - 1)
+    while throttle.isActive():
+        QApplication.processEvents()
+
+    assert seeks[-1] == slider.value()
+    widget.close()
+    return moves, len(seeks)
+
+
+def runEventLoop(seconds):
+    loop = QEventLoop()
+    QTimer.singleShot(int(seconds * 1000), loop.quit)
+    start = time.perf_counter()
+    result = loop.exec_()
+    # a loop that returns at once, after the application was asked to quit, would make every rate 0
+    assert result == 0 and time.perf_counter() - start >= seconds * 0.9, "the event loop did not run"
+
+
+def benchWakeups(seconds=9):
+    # wakeups of a playing Window counted by its own WakeupCounter while visible, minimized (the backend
+    # ticks at idleInterval, so a phase spans a few of them) and paused, and how far the slider is off
+    # the player after the restore
+    backend = FakeBackend(defaultDuration=3600000)
+    # stands in for the player's own position timer, it only runs while playing and fires at the next notify
+    clock = QTimer()
+    clock.setSingleShot(True)
+    clock.setTimerType(Qt.PreciseTimer)
+    ticked = [time.perf_counter()]
+    def tick():
+        now = time.perf_counter()
+        backend.advance(round((now - ticked[0]) * 1000))
+        ticked[0] = now
+        clock.start(backend.notifyInterval() - backend.sinceNotify)
+
+    def stateChanged(state):
+        if state == PlaybackBackend.PlayingState:
+            ticked[0] = time.perf_counter()
+            clock.start(backend.notifyInterval() - backend.sinceNotify)
+        else:
+            clock.stop()
+
+    clock.timeout.connect(tick)
+    backend.stateChanged.connect(stateChanged)
+
+    with windowHome(1000):
+        window = loadWindow(backend)
+        window.show()
+        settle()
+        window.play()
+        rates = []
+        for phase in ("visible", "minimized", "paused"):
+            if phase == "minimized":
+                window.showMinimized()
+                assert window.idle
+
+            elif phase == "paused":
+                window.showNormal()
+                QApplication.processEvents()
+                assert not window.idle
+                # a real player has moved on since its last tick, the fake one only moves on ticks
+                playing = backend.position() + int((time.perf_counter() - ticked[0]) * 1000)
+                error = abs(window.playerWidget.musicSlider.value() - playing)
+                window.play()
+
+            window.wakeups.restart()
+            runEventLoop(seconds)
+            rates.append(window.wakeups.restart())
+
+        clock.stop()
+        closeWindow(window)
+
+    return rates + [error]
+
+
+def benchResume(count, ticks=100000):
+    with tempfile.TemporaryDirectory() as directory:
+        library = Library(os.path.join(directory, "library.db"))
+        tracks = syntheticTracks(count)
+        library.addTracks(tracks)
+        library.setPositions((track.url, 60000 + i) for i, track in enumerate(tracks))
+
+        start = time.perf_counter()
+        positions = library.positions()
+        load = time.perf_counter() - start
+
+        # the lookup done on every track change
+        urls = [track.url for track in tracks]
+        start = time.perf_counter()
+        for step in range(ticks):
+            positions.get(urls[step % count])
+        lookup = (time.perf_counter() - start) / ticks
+
+        # what a debounced flush of one changed position costs
+        start = time.perf_counter()
+        for step in range(100):
+            library.setPositions([(urls[step % count], 120000 + step)])
+        write = (time.perf_counter() - start) / 100
+        library.close()
+
+    return load, lookup, write
+
+
+@contextlib.contextmanager
+def windowHome(count, **values):
+    # a HOME of its own for Window holding the synthetic library, its prints are dropped so the JSON stays clean
+    environ = dict(os.environ)
+    with tempfile.TemporaryDirectory() as home, contextlib.redirect_stdout(io.StringIO()):
+        os.makedirs(os.path.join(home, ".iplayer"))
+        shutil.copy(syntheticLibrary(count), os.path.join(home, ".iplayer", "library.db"))
+        os.environ["HOME"] = home
+        os.environ["XDG_CONFIG_HOME"] = os.path.join(home, ".config")
+        settingsModule._settings = None
+        for key, value in values.items():
+            settings().setValue(key, value)
+
+        try:
+            yield home
+
+        finally:
+            os.environ.clear()
+            os.environ.update(environ)
+            settingsModule._settings = None
+
+
+def loadWindow(backend=None):
+    window = Window(backend if backend is not None else FakeBackend())
+    window.playListLoader.wait()
+    while window.playListLoading:
+        QApplication.processEvents()
+
+    return window
+
+
+def closeWindow(window):
+    # closeEvent quits the application, every event loop a later benchmark started would then return at once
+    with mock.patch("iplayer.qApp"):
+        window.close()
+    window.deleteLater()
+    QApplication.processEvents()
+
+
+def benchPlayback(count, changes=1000, seeks=1000):
+    # plays through the playlist with a real Window on the fake backend, tracks are switched by the preload
+    urls = [track.url for track in syntheticTracks(count)]
+    backend = FakeBackend({url: 60000 + i % 7 * 1000 for i, url in enumerate(urls)})
+    with windowHome(count, playbackMode=PlayOrder.Loop, gapless=True, resumeMinDuration=60):
+        window = loadWindow(backend)
+        switches = []
+        backend.currentMediaChanged.connect(switches.append)
+
+        start = time.perf_counter()
+        window.play()
+        while len(switches) <= changes:
+            backend.advance(60000)
+        change = (time.perf_counter() - start) / changes
+
+        # a seek lands right away on the fake backend, releasing the throttle for the next one
+        start = time.perf_counter()
+        for step in range(seeks):
+            window.musicPositionMove(step * 37 % backend.duration())
+        seek = (time.perf_counter() - start) / seeks
+
+        # the positions played since the last debounced write are saved on close
+        start = time.perf_counter()
+        closeWindow(window)
+        close = time.perf_counter() - start
+
+    return change, seek, close
+
+
+def writeAudioFiles(directory, count, seconds=1):
+    paths = []
+    for i in range(count):
+        path = os.path.join(directory, f"{i:07d} - track.wav")
+        with wave.open(path, "wb") as file:
+            file.setnchannels(2)
+            file.setsampwidth(2)
+            file.setframerate(44100)
+            file.writeframes(bytes(4 * 44100 * seconds))
+        paths.append(path)
+
+    return paths
+
+
+def benchMetadataScan(count):
+    with tempfile.TemporaryDirectory() as directory:
+        paths = writeAudioFiles(directory, count)
+        tracks = [Track(Path(path).as_uri()) for path in paths]
+        rates = []
+        # the first pass reads the files, the second one is served from the metadata cache
+        for _ in range(2):
+            scanner = MetadataScanner(tracks, [range(count)], os.path.join(directory, "metadata.db"))
+            results = []
+            scanner.metadataLoaded.connect(results.extend)
+
+            start = time.perf_counter()
+            scanner.run()
+            elapsed = time.perf_counter() - start
+            rates.append(len(results) / elapsed if elapsed else 0)
+
+    return rates
+
+
+def benchGapless(tracks=4, seconds=2):
+    # needs a working QtMultimedia backend, returns None without one
+    try:
+        from player import DualPlayer
+
+    except ImportError:
+        return None
+
+    with tempfile.TemporaryDirectory() as directory:
+        urls = [QUrl.fromLocalFile(path).toString() for path in writeAudioFiles(directory, tracks, seconds)]
+        player = DualPlayer()
+
+        def preload(pos):
+            if urls and player.duration() > 0 and player.duration() - pos < 1000 and player.preloaded is None:
+                player.preload(urls.pop(0))
+
+        player.positionChanged.connect(preload)
+        player.setMedia(urls.pop(0))
+        player.play()
+        deadline = time.monotonic() + tracks * seconds + 5
+        while len(player.gaps) < tracks - 1 and time.monotonic() < deadline:
+            QApplication.processEvents()
+            time.sleep(0.001)
+        player.stop()
+
+    return sum(player.gaps) / len(player.gaps) if player.gaps else None
+
+
+def benchPrefetch(count, seconds=30):
+    with tempfile.TemporaryDirectory() as directory:
+        paths = writeAudioFiles(directory, count, seconds)
+        prefetcher = Prefetcher()
+        done = []
+        prefetcher.prefetched.connect(done.append)
+        prefetcher.start()
+
+        start = time.perf_counter()
+        prefetcher.prefetch(paths)
+        while not done:
+            QApplication.processEvents()
+            time.sleep(0.001)
+        elapsed = time.perf_counter() - start
+        prefetcher.stop()
+
+    return done[0] / elapsed / 1024 / 1024
+
+
+def benchProbe(count):
+    with tempfile.TemporaryDirectory() as directory:
+        paths = writeAudioFiles(directory, count)
+
+        start = time.perf_counter()
+        results = [probe(path) for path in paths]
+        elapsed = time.perf_counter() - start
+
+    assert all(results)
+    return elapsed / count
+
+
+def mp3Frame(size, mono=False):
+    # MPEG-1 layer III, 128 kbps, 44.1 kHz, the side info of a stereo frame is 32 bytes
+    header = struct.pack(">I", 0xfffb90c0 if mono else 0xfffb9000)
+    return header + bytes(size - 4)
+
+
+def syntheticMp3(tag=None, frames=1000, delay=576, padding=1000, audio=16000):
+    frame = bytearray(mp3Frame(417))
+    if tag == b"Xing":
+        # all four flags, so the frame count, byte count, TOC and quality fields are skipped in turn
+        lame = b"LAME3.100" + bytes(12) + bytes((delay >> 4, (delay & 0x0f) << 4 | padding >> 8, padding & 0xff))
+        frame[36:36 + 120 + len(lame)] = b"Xing" + struct.pack(">III", 15, frames, audio) + bytes(104) + lame
+
+    elif tag == b"VBRI":
+        frame[36:54] = b"VBRI" + struct.pack(">HHHII", 1, 0, 75, audio, frames)
+
+    else:
+        frame = mp3Frame(audio)
+
+    # an ID3v2 tag in front, its syncsafe size is skipped
+    return b"ID3\x04\x00\x00\x00\x00\x00\x64" + bytes(100) + bytes(frame)
+
+
+def syntheticFlac(sampleRate=96000, samples=336000):
+    info = struct.pack(">HH3s3sQ", 4096, 4096, bytes(3), bytes(3), sampleRate << 44 | 1 << 41 | 15 << 36 | samples)
+    return b"fLaC" + bytes((0x80, 0, 0, 34)) + info + bytes(16) + bytes(1000)
+
+
+def oggPage(packet, granule, headerType=0):
+    return struct.pack("<4sBBqIIIB", b"OggS", 0, headerType, granule, 1, 0, 0, 1) + bytes((len(packet),)) + packet
+
+
+def syntheticOgg(codec, sampleRate, granule, preSkip=0):
+    if codec == "opus":
+        head = b"OpusHead" + struct.pack("<BBHIhB", 1, 2, preSkip, sampleRate, 0, 0)
+
+    else:
+        head = b"\x01vorbis" + struct.pack("<IBIiiiBB", 0, 2, sampleRate, 0, 128000, 0, 0xb8, 1)
+
+    return oggPage(head, 0, 2) + oggPage(bytes(200), granule // 2) + oggPage(bytes(200), granule, 4)
+
+
+def mp4Atom(name, *children):
+    content = b"".join(children)
+    return struct.pack(">I4s", 8 + len(content), name) + content
+
+
+def syntheticMp4(timescale=1000, duration=5250, sampleRate=44100, longHeaders=False):
+    if longHeaders:
+        mvhd = struct.pack(">I QQ IQ", 1 << 24, 0, 0, timescale, duration)
+        mdhd = struct.pack(">I QQ IQ", 1 << 24, 0, 0, sampleRate, duration * sampleRate // timescale)
+
+    else:
+        mvhd = struct.pack(">I II II", 0, 0, 0, timescale, duration)
+        mdhd = struct.pack(">I II II", 0, 0, 0, sampleRate, duration * sampleRate // timescale)
+
+    return (mp4Atom(b"ftyp", b"M4A \x00\x00\x00\x00") + mp4Atom(b"free", bytes(16)) +
+            mp4Atom(b"moov", mp4Atom(b"mvhd", mvhd + bytes(80)),
+                    mp4Atom(b"trak", mp4Atom(b"tkhd", bytes(84)), mp4Atom(b"mdia", mp4Atom(b"mdhd", mdhd + bytes(4))))) +
+            mp4Atom(b"mdat", bytes(4000)))
+
+
+def checkProbe():
+    # synthetic headers for every container probe reads, returns the number of files checked
+    xing = syntheticMp3(b"Xing")
+    flac = syntheticFlac()
+    opus = syntheticOgg("opus", 44100, 48000 * 5 // 2 + 312, 312)
+    mp4 = syntheticMp4()
+    expected = [
+        (xing, (1000 * 1152 - 576 - 1000) * 1000 // 44100, 44100, "mp3"),
+        (syntheticMp3(b"VBRI", frames=500), 500 * 1152 * 1000 // 44100, 44100, "mp3"),
+        (syntheticMp3(), 1000, 44100, "mp3"),
+        (flac, 3500, 96000, "flac"),
+        (opus, 2500, 48000, "opus"),
+        (syntheticOgg("vorbis", 22050, 22050 * 4), 4000, 22050, "vorbis"),
+        (mp4, 5250, 44100, "mp4"),
+        (syntheticMp4(600, 1800, 48000, True), 3000, 48000, "mp4"),
+        # truncated and garbage files have no duration
+        (b"", None, None, None),
+        (b"just some text, no audio here\n" * 100, None, None, None),
+        (xing[:110 + 4 + 36 + 10], None, None, None),
+        (flac[:12], None, None, None),
+        (opus[:20], None, None, None),
+        (opus[:27 + 1 + 19] + b"OggS", None, None, None),
+        (mp4[:mp4.index(b"moov") - 4], None, None, None),
+        (mp4[:mp4.index(b"mvhd") + 12], None, None, None),
+        (b"RIFF\x00\x00\x00\x00WAVE", None, None, None),
+    ]
+
+    with tempfile.TemporaryDirectory() as directory:
+        for i, (data, duration, sampleRate, codec) in enumerate(expected):
+            path = os.path.join(directory, f"{i}.audio")
+            with open(path, "wb") as file:
+                file.write(data)
+
+            found = probe(path)
+            if duration is None:
+                assert found is None, (i, found and found.duration)
+            else:
+                assert found is not None, i
+                assert (found.duration, found.sampleRate, found.codec) == (duration, sampleRate, codec), \
+                    (i, found.duration, found.sampleRate, found.codec)
+
+    return len(expected)
+
+
+def bySize(function, sizes, names=None):
+    results = {}
+    for count in sizes:
+        print(function.__name__, count, file=sys.stderr)
+        value = function(count)
+        results[str(count)] = dict(zip(names, value)) if names else value
+
+    return results
+
+
+def runAll(sizes):
+    # times are in seconds
+    small = [count for count in sizes if count <= 100000]
+    wakeups = benchWakeups()
+    benchmarks = {
+        "loadPlayList": bySize(benchLoadPlayList, sizes),
+        "addPlayList": bySize(benchAddPlayList, sizes),
+        "shufflePlayList": bySize(benchShufflePlayList, sizes),
+        "shuffleWalk": bySize(benchShuffle, sizes),
+        "playOrderStep": bySize(benchPlayOrder, sizes),
+        "highlight": bySize(benchHighlight, sizes),
+        "closeEvent": bySize(benchCloseEvent, sizes),
+        "startup": bySize(benchStartup, sizes),
+        "duplicates": bySize(benchDuplicates, small, ("check", "remove")),
+        "search": bySize(benchSearch, small, ("index", "retag", "keystrokeMean", "keystrokeMax")),
+        "sort": bySize(benchSort, small, ("cold", "cachedKeys")),
+        "resume": bySize(benchResume, small, ("load", "lookup", "write")),
+        "playback": bySize(benchPlayback, small, ("perTrack", "seek", "close")),
+        "seekDrag": dict(zip(("moves", "seeks"), benchSeekDrag())),
+        "wakeupsPerSecond": dict(zip(("visible", "minimized", "paused"), wakeups)),
+        "restoreSliderErrorMs": wakeups[3],
+        "gaplessGapMs": benchGapless(),
+        "prefetchMbPerSecond": benchPrefetch(8),
+        "probePerFile": benchProbe(2000),
+        "probeChecks": checkProbe(),
+        "metadataScanFilesPerSecond": dict(zip(("cold", "cached"), benchMetadataScan(2000))),
+    }
+
+    return {
+        "environment": {
+            "python": platform.python_version(),
+            "qt": QT_VERSION_STR,
+            "pyqt": PYQT_VERSION_STR,
+            "platform": platform.platform(),
+            "qpa": os.environ.get("QT_QPA_PLATFORM"),
+        },
+        "sizes": sizes,
+        "benchmarks": benchmarks,
+        "peakRssKb": peakRss(),
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmarks of the playlist and UI hot paths, printed as JSON")
+    parser.add_argument("--sizes", default="1000,10000,100000,1000000",
+                        help="comma separated playlist sizes (default: %(default)s)")
+    parser.add_argument("--output", help="also write the results to this file")
+    parser.add_argument("--startup", type=float, metavar="SPAWNED", help=argparse.SUPPRESS)
+    arguments = parser.parse_args()
+
+    if arguments.startup:
+        startup(arguments.startup)
+        sys.exit()
+
+    app = QApplication(sys.argv[:1])
+    results = runAll([int(size) for size in arguments.sizes.split(",")])
+    text = json.dumps(results, indent=2)
+    if arguments.output:
+        with open(arguments.output, "w", encoding="utf-8") as file:
+            file.write(text + "\n")
+    print(text)
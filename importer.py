@@ -0,0 +1,77 @@
+import os
+from PyQt5.QtCore import QThread, QUrl, pyqtSignal
+from playlist import Track
+from probe import isAudioFile
+
+
+AUDIO_EXTENSIONS = {".mp3", ".mp2", ".flac", ".ogg", ".oga", ".opus", ".wav", ".m4a", ".mp4", ".aac", ".wma"}
+
+
+class FolderScanner(QThread):
+
+    tracksFound = pyqtSignal(list)
+    progress = pyqtSignal(int, int)
+
+    def __init__(self, paths, batchSize=500, parent=None):
+        super().__init__(parent)
+        self.paths = paths
+        self.batchSize = batchSize
+        self.scanned = 0
+        self.found = 0
+
+    def run(self):
+        batch = []
+        for path in self.paths:
+            if os.path.isdir(path):
+                for music in self.walk(path):
+                    batch.append(Track(QUrl.fromLocalFile(music).toString(), os.path.basename(music)))
+                    if len(batch) >= self.batchSize:
+                        self.__emit(batch)
+                        batch = []
+
+            else:
+                self.scanned += 1
+                batch.append(Track(QUrl.fromLocalFile(path).toString(), os.path.basename(path)))
+
+            if self.isInterruptionRequested():
+                return
+
+        self.__emit(batch)
+
+    def walk(self, root):
+        stack = [root]
+        while stack:
+            try:
+                with os.scandir(stack.pop()) as entries:
+                    entries = sorted(entries, key=lambda entry: entry.name.lower())
+
+            except OSError:
+                continue
+
+            directories = []
+            for entry in entries:
+                if self.isInterruptionRequested():
+                    return
+
+                try:
+                    if entry.is_dir(follow_symlinks=False):
+                        directories.append(entry.path)
+                        continue
+
+                except OSError:
+                    continue
+
+                self.scanned += 1
+                if self.scanned % 1000 == 0:
+                    self.progress.emit(self.scanned, self.found)
+
+                if os.path.splitext(entry.name)[1].lower() in AUDIO_EXTENSIONS and isAudioFile(entry.path):
+                    yield entry.path
+
+            stack.extend(reversed(directories))
+
+    def __emit(self, batch):
+        self.found += len(batch)
+        if batch:
+            self.tracksFound.emit(batch)
+        self.progress.emit(self.scanned, self.found)
@@ -1,13 +1,35 @@
-from PyQt5.QtWidgets import QApplication, QMainWindow, QWidget, QVBoxLayout, qApp, QListWidgetItem
-from PyQt5.QtWinExtras import QWinTaskbarButton, QWinThumbnailToolBar, QWinThumbnailToolButton
-from PyQt5.QtGui import QBrush, QIcon
-from PyQt5.QtCore import QUrl, QDir, QFile, QIODevice, QTextStream, Qt, QThread, pyqtSignal
-from PyQt5.QtMultimedia import QMediaContent, QMediaPlayer, QMediaPlaylist
-from playerwidget import PlayerWidget, PlayListWidget
+from PyQt5.QtWidgets import QApplication, QMainWindow, QWidget, QVBoxLayout, qApp, QFileDialog, QLineEdit, QInputDialog
+try:
+    from PyQt5.QtWinExtras import QWinTaskbarButton, QWinThumbnailToolBar, QWinThumbnailToolButton
+
+except ImportError:
+    # the taskbar progress and thumbnail buttons only exist on Windows
+    QWinTaskbarButton = None
+from PyQt5.QtGui import QIcon
+from PyQt5.QtCore import QUrl, QDir, QThread, QTimer, QEvent, pyqtSignal
+from backend import PlaybackBackend
+from playerwidget import PlayerWidget, PlayListWidget, ImportProgress
+from playlist import Track, readPlayList, urlToPath
+from metadata import MetadataScanner
+from importer import FolderScanner
+from playorder import PlayOrder
+from library import PlayListLoader
+from persistence import PersistenceService
+from prefetch import Prefetcher
 from settings import settings
+from throttle import Throttle
+from wakeups import WakeupCounter
 import playericon
 import sys
-from pynput.keyboard import Key, Listener
+import time
+from itertools import chain
+
+try:
+    from pynput.keyboard import Key, Listener
+
+except ImportError:
+    # pynput needs a display, without one there are just no media keys
+    Listener = None
 
 
 class CaptureKey(QThread):
@@ -35,15 +57,16 @@ class CaptureKey(QThread):
             self.captureKeyState.emit("next")
 
     def run(self):
-        self.listen()
+        if Listener is not None:
+            self.listen()
 
 
 class Window(QMainWindow):
 
-    currentItem = None
     firstOpen = False
+    playListLoading = True
 
-    def __init__(self):
+    def __init__(self, backend=None):
         super().__init__()
         self.setWindowTitle("IPlayer")
         self.setWindowIcon(QIcon(":/icon/music.svg"))
@@ -56,13 +79,51 @@ class Window(QMainWindow):
         self.playerWidget = PlayerWidget(self)
         self.mainLayout.addWidget(self.playerWidget)
 
+        self.searchEdit = QLineEdit(self)
+        self.searchEdit.setPlaceholderText("Search")
+        self.searchEdit.setClearButtonEnabled(True)
+        self.mainLayout.addWidget(self.searchEdit)
+
         self.playListWidget = PlayListWidget(self)
         self.mainLayout.addWidget(self.playListWidget)
 
-        self.mediaPlayer = QMediaPlayer(self)
-        self.mediaPlayer.setVolume(int(settings().value("volume") or 100))
-        self.playList = QMediaPlaylist(self)
-        self.mediaPlayer.setPlaylist(self.playList)
+        self.importProgress = ImportProgress(self)
+        self.mainLayout.addWidget(self.importProgress)
+
+        if not QDir().exists(QDir.homePath()+"/.iplayer"):
+            QDir().mkdir(QDir.homePath()+"/.iplayer")
+        self.persistence = PersistenceService(QDir.homePath() + "/.iplayer/library.db", settings(), parent=self)
+        self.persistence.start()
+
+        # any PlaybackBackend, DualPlayer plays through QtMultimedia
+        if backend is None:
+            from player import DualPlayer
+            backend = DualPlayer(self)
+        self.mediaPlayer = backend
+        self.mediaPlayer.setVolume(settings().volume())
+        self.mediaPlayer.setCrossfade(settings().crossfade() * 1000)
+        # slider drags ask for a seek or volume change on every mouse move, only the latest one is applied
+        self.seekThrottle = Throttle(self.mediaPlayer.setPosition, 250, self)
+        self.volumeThrottle = Throttle(self.mediaPlayer.setVolume, 50, self)
+        # position ticks are slowed down while the window is minimized or hidden, the slider
+        # is interpolated from the last tick when it shows again
+        self.visibleInterval = self.mediaPlayer.notifyInterval()
+        self.idleInterval = 4000
+        self.idle = False
+        self.lastPosition = (0, time.perf_counter())
+        self.wakeups = WakeupCounter(self)
+        # the next track is opened this many ms before the current one ends
+        self.preloadTime = 5000
+        self.preloadedIndex = None
+        self.prefetcher = Prefetcher(settings().prefetchBudget(), parent=self)
+        self.prefetcher.start()
+        self.playOrder = PlayOrder()
+        self.playOrder.mode = settings().playbackMode()
+        self.playOrder.shuffle.enabled = settings().shuffle()
+
+        # created in showEvent where QtWinExtras is available
+        self.taskBarProgress = None
+        self.thumbnailPlayButton = None
 
         self.captureKey = CaptureKey(self)
         self.captureKey.captureKeyState.connect(self.captureKeyClick)
@@ -78,38 +139,70 @@ class Window(QMainWindow):
         self.playerWidget.repeatButtonClicked.connect(self.repeatPlayList)
         self.playerWidget.musicPositionMoved.connect(self.musicPositionMove)
 
-        self.playListWidget.musicDrop.connect(self.addPlayList)
-        self.playListWidget.itemDoubleClicked.connect(self.selectMusicPlay)
+        self.searchEdit.textChanged.connect(self.playListWidget.setFilter)
+        self.playListWidget.musicDrop.connect(self.dropMusics)
+        self.playListWidget.addFolderClicked.connect(self.addFolder)
+        self.playListWidget.importClicked.connect(self.importPlayList)
+        self.playListWidget.exportClicked.connect(self.exportPlayList)
+        self.playListWidget.doubleClicked.connect(self.selectMusicPlay)
+        self.playListWidget.playNextClicked.connect(self.playNext)
+        self.playListWidget.removeDuplicatesClicked.connect(self.removeDuplicates)
+        self.playListWidget.skipDuplicatesToggled.connect(settings().setSkipDuplicates)
+        self.playListWidget.sortClicked.connect(self.sortPlayList)
+        self.playListWidget.gaplessToggled.connect(self.setGapless)
+        self.playListWidget.crossfadeChanged.connect(self.setCrossfade)
+        self.playListWidget.addBookmarkClicked.connect(self.addBookmark)
+        self.playListWidget.bookmarkClicked.connect(self.mediaPlayer.setPosition)
+        self.playListWidget.clearBookmarksClicked.connect(self.clearBookmarks)
 
         self.mediaPlayer.audioAvailableChanged.connect(self.audioAvailableChanged)
         self.mediaPlayer.currentMediaChanged.connect(self.currentMediaChanged)
         # self.mediaPlayer.durationChanged.connect(self.durationChanged)
-        self.mediaPlayer.mediaChanged.connect(self.mediaChanged)
         self.mediaPlayer.mutedChanged.connect(self.mutedChanged)
         self.mediaPlayer.positionChanged.connect(self.positionChanged)
         self.mediaPlayer.seekableChanged.connect(self.seekableChanged)
         self.mediaPlayer.stateChanged.connect(self.stateChanged)
         self.mediaPlayer.volumeChanged.connect(self.volumeChanged)
+        self.mediaPlayer.mediaStatusChanged.connect(self.mediaStatusChanged)
+        self.mediaPlayer.trackSwitched.connect(self.trackSwitched)
         self.mediaPlayer.error.connect(self.error)
 
-        self.playList.loaded.connect(self.loaded)
-        self.playList.loadFailed.connect(self.loadFailed)
-
-        self.loadPlayList()
-        self.mediaPlayer.playlist().setCurrentIndex(int(settings().value("currentMusic") or 0))
-
-        item = self.playListWidget.item(int(settings().value("currentMusic") or 0))
-        if isinstance(item, QListWidgetItem):
-            item.setForeground(Qt.lightGray)
-            item.setBackground(Qt.darkGray)
-            self.currentItem = item
-        playback = int(settings().value("playbackMode") or 2)
-        if playback == 1:
-            self.mediaPlayer.playlist().setPlaybackMode(QMediaPlaylist.CurrentItemInLoop)
-        elif playback == 2:
-            self.mediaPlayer.playlist().setPlaybackMode(QMediaPlaylist.Sequential)
-        elif playback == 3:
-            self.mediaPlayer.playlist().setPlaybackMode(QMediaPlaylist.Loop)
+        self.restoreMusic = settings().currentMusic()
+        self.pendingTracks = []
+        self.playListLoader = PlayListLoader(QDir.homePath() + "/.iplayer/library.db",
+                                             QDir.homePath() + "/.iplayer/playlist.db", parent=self)
+        self.playListLoader.positionsLoaded.connect(self.positionsLoaded)
+        self.playListLoader.tracksLoaded.connect(self.playListLoaded)
+        self.playListLoader.orderLoaded.connect(self.orderLoaded)
+        self.playListLoader.finished.connect(self.playListFinished)
+        self.playListLoader.start()
+
+        self.loadedOrder = None
+        self.metadataScanner = None
+        self.pendingScan = []
+        self.stoppingScanners = []
+        self.folderScanners = []
+        self.sortField = None
+        self.sortDescending = False
+        self.importProgress.cancelClicked.connect(self.cancelImport)
+
+        self.orderTimer = QTimer(self)
+        self.orderTimer.setSingleShot(True)
+        self.orderTimer.setInterval(2000)
+        self.orderTimer.timeout.connect(self.saveOrder)
+
+        # last position of every track by url, written at most once per positionTimer interval
+        self.resumePositions = {}
+        self.changedPositions = {}
+        self.bookmarks = {}
+        # the start and the end of a track are not worth resuming
+        self.resumeMargin = 10000
+        # seek target waiting for the current media to load
+        self.resumePosition = None
+        self.positionTimer = QTimer(self)
+        self.positionTimer.setSingleShot(True)
+        self.positionTimer.setInterval(5000)
+        self.positionTimer.timeout.connect(self.savePositions)
 
     def captureKeyClick(self, state):
         print(state)
@@ -123,43 +216,257 @@ class Window(QMainWindow):
             self.nextMusic()
 
     def addPlayList(self, musics):
-        self.playListWidget.addMusics(musics)
-        for music in musics:
-            self.playList.addMedia(QMediaContent(music))
+        self.addTracks([Track(music.toString(), music.fileName()) for music in musics])
+
+    def addTracks(self, tracks):
+        if self.playListLoading:
+            self.pendingTracks.extend(tracks)
+            return
+
+        if settings().skipDuplicates():
+            tracks = self.playListWidget.playListModel.uniqueTracks(tracks)
+
+        if not tracks:
+            return
+
+        added = time.time()
+        for track in tracks:
+            if track.added is None:
+                track.added = added
+
+        # one model insert, one library transaction and one order extension per batch
+        self.playListWidget.addTracks(tracks)
+        self.persistence.submit("addTracks", tracks)
+        self.playOrder.extend(len(tracks))
+        if self.playOrder.shuffle.enabled:
+            self.orderTimer.start()
+        self.scanMetadata(range(len(self.playOrder) - len(tracks), len(self.playOrder)))
+
+    def removeDuplicates(self):
+        if self.playListLoading:
+            return
+
+        mapping = self.playListWidget.playListModel.removeDuplicates()
+        if mapping is not None:
+            self.playListReordered(mapping)
+
+    def sortPlayList(self, field):
+        if self.playListLoading:
+            return
+
+        # picking the same field again reverses the order
+        self.sortDescending = field == self.sortField and not self.sortDescending
+        self.sortField = field
+        self.playListReordered(self.playListWidget.playListModel.sortBy(field, self.sortDescending))
+
+    def playListReordered(self, mapping):
+        model = self.playListWidget.playListModel
+        # the model has already moved its current row along
+        self.orderChanged()
+        self.playOrder.remap(mapping, len(model.tracks))
+        if self.playOrder.current >= 0:
+            settings().setCurrentMusic(self.playOrder.current)
+
+        self.persistence.submit("setTracks", list(model.tracks))
+        self.saveOrder()
+
+        # rows of the running scan are stale now, restart it with the remapped rows; it is not
+        # waited for, the batches it still sends are dropped as they no longer come from metadataScanner
+        if self.metadataScanner is not None:
+            self.metadataScanner.requestInterruption()
+            self.stoppingScanners.append(self.metadataScanner)
+            self.pendingScan = self.metadataScanner.rows + self.pendingScan
+            self.metadataScanner = None
+        if self.pendingScan:
+            self.pendingScan = [[mapping[row] for row in chain.from_iterable(self.pendingScan)]]
+        self.scanMetadata([])
+
+    def dropMusics(self, musics):
+        paths = [music.toLocalFile() for music in musics if music.isLocalFile()]
+        self.addPlayList([music for music in musics if not music.isLocalFile()])
+        if paths:
+            self.importFolders(paths)
+
+    def addFolder(self):
+        path = QFileDialog.getExistingDirectory(self, "Add folder", QDir.homePath())
+        if path:
+            self.importFolders([path])
+
+    def importFolders(self, paths):
+        scanner = FolderScanner(paths, parent=self)
+        scanner.tracksFound.connect(self.addTracks)
+        scanner.progress.connect(self.importProgress.setProgress)
+        scanner.finished.connect(lambda: self.importFinished(scanner))
+        # finished threads would otherwise stay alive as children of the window with their items
+        scanner.finished.connect(scanner.deleteLater)
+        self.folderScanners.append(scanner)
+        scanner.start()
+
+    def importFinished(self, scanner):
+        self.folderScanners.remove(scanner)
+        if not self.folderScanners:
+            self.importProgress.hide()
+
+    def cancelImport(self):
+        for scanner in self.folderScanners:
+            scanner.requestInterruption()
+
+    def saveOrder(self):
+        self.persistence.submit("setOrder", self.playOrder.shuffle.toBytes())
+
+    def scanMetadata(self, rows):
+        # rows is a range or list, the scanner skips tracks that already have their duration
+        # from the library, so a start neither walks the playlist here nor touches known files
+        if rows:
+            self.pendingScan.append(rows)
+        if not self.pendingScan or self.metadataScanner is not None:
+            return
+
+        self.metadataScanner = MetadataScanner(self.playListWidget.playListModel.tracks, self.pendingScan,
+                                               QDir.homePath() + "/.iplayer/metadata.db", parent=self)
+        self.metadataScanner.metadataLoaded.connect(self.metadataLoaded)
+        self.metadataScanner.finished.connect(self.metadataFinished)
+        self.metadataScanner.finished.connect(self.metadataScanner.deleteLater)
+        self.pendingScan = []
+        self.metadataScanner.start()
+
+    def metadataFinished(self):
+        if self.sender() is not self.metadataScanner:
+            if self.sender() in self.stoppingScanners:
+                self.stoppingScanners.remove(self.sender())
+            return
+
+        self.metadataScanner = None
+        self.scanMetadata([])
+
+    def metadataLoaded(self, batch):
+        if self.sender() is not self.metadataScanner:
+            return
+
+        rows = self.playListWidget.playListModel.setMetadata(batch)
+        if rows:
+            tracks = self.playListWidget.playListModel.tracks
+            self.persistence.submit("setMetadata", [(tracks[row].url, tracks[row].duration, tracks[row].title,
+                                                     tracks[row].artist, tracks[row].album) for row in rows])
+
+    def importPlayList(self):
+        path, _ = QFileDialog.getOpenFileName(self, "Import playlist", QDir.homePath(), "Playlist (*.m3u *.m3u8)")
+        if path:
+            self.addPlayList([QUrl(track.url) for track in readPlayList(path)])
+
+    def exportPlayList(self):
+        path, _ = QFileDialog.getSaveFileName(self, "Export playlist", QDir.homePath(), "Playlist (*.m3u)")
+        if path:
+            self.persistence.submit("exportM3u", path)
 
     def selectMusicPlay(self, item):
-        index = self.playListWidget.row(item)
-        self.mediaPlayer.playlist().setCurrentIndex(index)
-        item = self.playListWidget.item(self.mediaPlayer.playlist().currentIndex())
-        item.setForeground(Qt.lightGray)
-        item.setBackground(Qt.darkGray)
-        self.currentItem = item
-        self.mediaPlayer.play()
+        self.setCurrentMusic(self.playOrder.setCurrent(self.playListWidget.row(item)), True)
+
+    def playNext(self, index):
+        self.orderChanged()
+        self.playOrder.playNext(index)
+
+    def setGapless(self, gapless):
+        settings().setGapless(gapless)
+        if not gapless:
+            self.cancelPreload()
+
+    def setCrossfade(self, seconds):
+        settings().setCrossfade(seconds)
+        self.mediaPlayer.setCrossfade(seconds * 1000)
+
+    def preloadNext(self, pos):
+        if self.preloadedIndex is not None or not (settings().gapless() or self.mediaPlayer.crossfade):
+            return
+
+        remaining = self.mediaPlayer.duration() - pos
+        if self.mediaPlayer.duration() <= 0 or remaining > self.preloadTime + self.mediaPlayer.crossfade:
+            return
+
+        # repeating the current track is a seek, not a preload
+        index = self.playOrder.peekNext(True)
+        if index < 0 or index == self.playOrder.current:
+            return
+
+        # a track with a resume position is opened by setCurrentMusic when this one ends
+        if self.savedPosition(index):
+            return
+
+        self.preloadedIndex = index
+        self.mediaPlayer.preload(self.playListWidget.playListModel.tracks[index].url)
+
+    def cancelPreload(self):
+        self.preloadedIndex = None
+        self.mediaPlayer.cancelPreload()
+
+    def orderChanged(self):
+        self.cancelPreload()
+        self.prefetchUpcoming()
+
+    def prefetchUpcoming(self):
+        # warms the page cache for the next tracks, a new call cancels the previous one
+        if self.playListLoading:
+            return
+
+        tracks = self.playListWidget.playListModel.tracks
+        paths = (urlToPath(tracks[index].url) for index in self.playOrder.upcoming(settings().prefetchTracks()))
+        self.prefetcher.prefetch(path for path in paths if path)
+
+    def trackSwitched(self):
+        self.rememberPosition(self.currentUrl(), 0)
+        preloaded, self.preloadedIndex = self.preloadedIndex, None
+        index = self.playOrder.next(True)
+        if index != preloaded:
+            self.setCurrentMusic(index, True)
+            return
+
+        self.playListWidget.setCurrentRow(index)
+        self.playListWidget.setBookmarks(self.bookmarks.get(self.currentUrl(), []))
+        settings().setCurrentMusic(index)
+        self.prefetchUpcoming()
+
+    def setCurrentMusic(self, index, play=False):
+        if index < 0:
+            return
+
+        self.preloadedIndex = None
+        url = self.playListWidget.playListModel.tracks[index].url
+        self.resumePosition = self.savedPosition(index)
+        self.mediaPlayer.setMedia(url)
+        self.playListWidget.setCurrentRow(index)
+        self.playListWidget.setBookmarks(self.bookmarks.get(url, []))
+        settings().setCurrentMusic(index)
+        self.prefetchUpcoming()
+        if play:
+            self.mediaPlayer.play()
 
     def play(self):
-        if self.mediaPlayer.state() == QMediaPlayer.PlayingState:
+        if self.mediaPlayer.state() == PlaybackBackend.PlayingState:
             self.mediaPlayer.pause()
 
-        elif self.mediaPlayer.state() == QMediaPlayer.PausedState:
+        elif self.mediaPlayer.state() == PlaybackBackend.PausedState:
             self.mediaPlayer.play()
 
-        elif self.mediaPlayer.state() == QMediaPlayer.StoppedState:
-            if self.mediaPlayer.playlist().currentIndex() < 0:
-                self.mediaPlayer.playlist().setCurrentIndex(0)
+        elif self.mediaPlayer.state() == PlaybackBackend.StoppedState:
+            if self.playOrder.current < 0:
+                self.setCurrentMusic(self.playOrder.setCurrent(0))
 
-            self.mediaPlayer.setPosition(0)
+            if self.resumePosition is None:
+                self.mediaPlayer.setPosition(self.savedPosition(self.playOrder.current) or 0)
             self.mediaPlayer.play()
 
     def playListShowOrHide(self):
         if self.playListWidget.isHidden():
             self.playListWidget.show()
+            self.searchEdit.show()
 
         else:
             self.playListWidget.hide()
+            self.searchEdit.hide()
 
 
     def volumeChange(self, volume):
-        self.mediaPlayer.setVolume(volume)
+        self.volumeThrottle.request(volume)
 
     def mutedChange(self):
         if self.mediaPlayer.isMuted():
@@ -169,51 +476,39 @@ class Window(QMainWindow):
             self.mediaPlayer.setMuted(True)
 
     def previousMusic(self):
-        self.mediaPlayer.playlist().previous()
-        item = self.playListWidget.item(self.mediaPlayer.playlist().currentIndex())
-        item.setForeground(Qt.lightGray)
-        item.setBackground(Qt.darkGray)
-        self.currentItem = item
+        self.setCurrentMusic(self.playOrder.previous(), self.mediaPlayer.state() == PlaybackBackend.PlayingState)
 
     def nextMusic(self):
-        self.mediaPlayer.playlist().next()
-        item = self.playListWidget.item(self.mediaPlayer.playlist().currentIndex())
-        item.setForeground(Qt.lightGray)
-        item.setBackground(Qt.darkGray)
-        self.currentItem = item
+        self.setCurrentMusic(self.playOrder.next(), self.mediaPlayer.state() == PlaybackBackend.PlayingState)
 
     def shufflePlayList(self):
-        self.mediaPlayer.playlist().shuffle()
-        self.playListWidget.clear()
-        for media in range(self.mediaPlayer.playlist().mediaCount()):
-            self.playListWidget.addMusic(self.mediaPlayer.playlist().media(media).canonicalUrl())
+        self.orderChanged()
+        self.playOrder.setShuffle(not self.playOrder.shuffle.enabled)
+        if self.playOrder.shuffle.enabled:
+            self.saveOrder()
 
-        item = self.playListWidget.item(self.mediaPlayer.playlist().currentIndex())
-        item.setForeground(Qt.lightGray)
-        item.setBackground(Qt.darkGray)
-        self.currentItem = item
+        settings().setShuffle(self.playOrder.shuffle.enabled)
+        self.playerWidget.mixedButtonStatus(self.playOrder.shuffle.enabled)
 
     def repeatPlayList(self):
-        if self.mediaPlayer.playlist().playbackMode() == QMediaPlaylist.Sequential:
-            self.mediaPlayer.playlist().setPlaybackMode(QMediaPlaylist.Loop)
-            self.playerWidget.repeatButtonStatus(3)
+        self.orderChanged()
+        if self.playOrder.mode == PlayOrder.Sequential:
+            self.playOrder.mode = PlayOrder.Loop
+
+        elif self.playOrder.mode == PlayOrder.Loop:
+            self.playOrder.mode = PlayOrder.CurrentItemInLoop
 
-        elif self.mediaPlayer.playlist().playbackMode() == QMediaPlaylist.Loop:
-            self.mediaPlayer.playlist().setPlaybackMode(QMediaPlaylist.CurrentItemInLoop)
-            self.playerWidget.repeatButtonStatus(1)
+        else:
+            self.playOrder.mode = PlayOrder.Sequential
 
-        elif self.mediaPlayer.playlist().playbackMode() == QMediaPlaylist.CurrentItemInLoop:
-            self.mediaPlayer.playlist().setPlaybackMode(QMediaPlaylist.Sequential)
-            self.playerWidget.repeatButtonStatus(2)
+        settings().setPlaybackMode(self.playOrder.mode)
+        self.playerWidget.repeatButtonStatus(self.playOrder.mode)
 
     def musicPositionMove(self, pos):
-        self.mediaPlayer.setPosition(pos)
-        try:
+        self.seekThrottle.request(pos)
+        if self.taskBarProgress is not None:
             self.taskBarProgress.setValue(pos)
 
-        except AttributeError as err:
-            print(err)
-
     #mediaplayer signals
     def audioAvailableChanged(self, available):
         # if available == False:
@@ -222,33 +517,39 @@ class Window(QMainWindow):
 
         if "Duration" in self.mediaPlayer.availableMetaData():
             self.playerWidget.setDuration(self.mediaPlayer.metaData("Duration"))
-            self.taskBarProgress.setMaximum(self.mediaPlayer.metaData("Duration"))
-            self.playListWidget.insertDuration(self.mediaPlayer.playlist().currentIndex(),
+            if self.taskBarProgress is not None:
+                self.taskBarProgress.setMaximum(self.mediaPlayer.metaData("Duration"))
+            self.playListWidget.insertDuration(self.playOrder.current,
                                                self.mediaPlayer.metaData("Duration"))
+            self.persistence.submit("setDuration", self.mediaPlayer.currentUrl(),
+                                    self.mediaPlayer.metaData("Duration"))
 
 
         for data in self.mediaPlayer.availableMetaData():
             print(data, self.mediaPlayer.metaData(data))
 
-    def currentMediaChanged(self, mediacontent):
-        print(mediacontent.canonicalUrl())
-        self.setWindowTitle(self.mediaPlayer.currentMedia().canonicalUrl().fileName())
-        if self.currentItem:
-            self.currentItem.setForeground(QBrush())
-            self.currentItem.setBackground(QBrush())
-
-        item = self.playListWidget.item(self.mediaPlayer.playlist().currentIndex())
-        print(item)
-        if isinstance(item, QListWidgetItem):
-            item.setForeground(Qt.lightGray)
-            item.setBackground(Qt.darkGray)
-            self.currentItem = item
+    def currentMediaChanged(self, url):
+        print(url)
+        self.setWindowTitle(QUrl(url).fileName())
 
     # def durationChanged(self, duration):
     #     pass
 
-    def mediaChanged(self, media):
-        print(media)
+    def mediaStatusChanged(self, status):
+        if status in (PlaybackBackend.LoadedMedia, PlaybackBackend.BufferedMedia) and self.resumePosition is not None:
+            position, self.resumePosition = self.resumePosition, None
+            self.mediaPlayer.setPosition(position)
+
+        elif status == PlaybackBackend.EndOfMedia:
+            self.rememberPosition(self.currentUrl(), 0)
+            current = self.playOrder.current
+            index = self.playOrder.next(True)
+            if index >= 0 and index == current:
+                self.mediaPlayer.setPosition(0)
+                self.mediaPlayer.play()
+
+            else:
+                self.setCurrentMusic(index, True)
 
     def mutedChanged(self, muted):
         if muted:
@@ -258,54 +559,141 @@ class Window(QMainWindow):
             self.playerWidget.mutedButtonStatus("speaker")
 
     def positionChanged(self, pos):
-        self.playerWidget.setPosition(pos)
-        try:
+        seek = self.seekThrottle.inFlight
+        if seek is not None and abs(pos - seek) < 1000:
+            # the seek landed, the next one can go
+            self.seekThrottle.release()
+
+        self.lastPosition = (pos, time.perf_counter())
+        if self.resumePosition is None:
+            self.rememberPosition(self.currentUrl(), pos)
+        self.preloadNext(pos)
+        # the taskbar progress is still shown while minimized, the slider catches up in updateIdle
+        if not self.idle and not self.seekThrottle.isActive():
+            self.playerWidget.setPosition(pos)
+        if self.taskBarProgress is not None:
             self.taskBarProgress.setValue(pos)
 
-        except AttributeError as err:
-            print(err)
-
     def seekableChanged(self, seekable):
         pass#print(seekable)
 
     def stateChanged(self, state):
-        if state == QMediaPlayer.PlayingState:
+        if state == PlaybackBackend.PlayingState:
             self.playerWidget.playButtonStatus("play")
-            self.thumbnailPlayButton.setIcon(QIcon(":/icon/pausew.png"))
+            icon = ":/icon/pausew.png"
 
-        elif state == QMediaPlayer.PausedState:
+        else:
             self.playerWidget.playButtonStatus("pause")
-            self.thumbnailPlayButton.setIcon(QIcon(":/icon/playw.png"))
+            icon = ":/icon/playw.png"
 
-        elif state == QMediaPlayer.StoppedState:
-            self.playerWidget.playButtonStatus("pause")
-            self.thumbnailPlayButton.setIcon(QIcon(":/icon/playw.png"))
+        if self.thumbnailPlayButton is not None:
+            self.thumbnailPlayButton.setIcon(QIcon(icon))
 
     def volumeChanged(self, volume):
-        pass#print(volume)
+        settings().setVolume(volume)
 
     def error(self, err):
         print(err, "asdasdasdasdasd")
 
-    def loaded(self):
-        print("loaded")
+    def positionsLoaded(self, positions, bookmarks):
+        self.resumePositions.update(positions)
+        self.bookmarks.update(bookmarks)
+
+    def currentUrl(self):
+        if self.playOrder.current < 0:
+            return None
+
+        return self.playListWidget.playListModel.tracks[self.playOrder.current].url
+
+    def savedPosition(self, index):
+        if index < 0:
+            return None
+
+        # a duration not scanned yet does not rule the track out, only long tracks get a position stored
+        track = self.playListWidget.playListModel.tracks[index]
+        if track.duration is not None and track.duration < settings().resumeMinDuration() * 1000:
+            return None
+
+        return self.resumePositions.get(track.url)
+
+    def rememberPosition(self, url, position):
+        if url is None:
+            return
 
-    def loadFailed(self):
-        print("loadFailed")
+        duration = self.mediaPlayer.duration()
+        if (duration < settings().resumeMinDuration() * 1000 or position < self.resumeMargin
+                or duration - position < self.resumeMargin):
+            position = 0
 
-    def loadPlayList(self):
-        file = QFile(QUrl.fromLocalFile(QDir.homePath()+"/.iplayer/playlist.db").toLocalFile())
-        file.open(QIODevice.ReadOnly|QIODevice.Text)
-        self.mediaPlayer.playlist().load(file, "m3u")
+        if self.resumePositions.get(url, 0) == position:
+            return
 
-        file = QFile(QUrl.fromLocalFile(QDir.homePath() + "/.iplayer/playlist.db").toLocalFile())
-        file.open(QIODevice.ReadOnly | QIODevice.Text)
+        if position:
+            self.resumePositions[url] = position
 
-        text = QTextStream(file)
-        while not text.atEnd():
-            line = text.readLine()
-            if line.startswith("file:/"):
-                self.playListWidget.addMusic(QUrl(line))
+        else:
+            self.resumePositions.pop(url, None)
+
+        self.changedPositions[url] = position
+        if not self.positionTimer.isActive():
+            self.positionTimer.start()
+
+    def savePositions(self):
+        self.positionTimer.stop()
+        if self.changedPositions:
+            self.persistence.submit("setPositions", list(self.changedPositions.items()))
+            self.changedPositions = {}
+
+    def addBookmark(self):
+        url = self.currentUrl()
+        if url is None:
+            return
+
+        position = self.mediaPlayer.position()
+        name, ok = QInputDialog.getText(self, "Add bookmark", "Name:",
+                                        text="{:02d}:{:02d}".format(position // 60000, position // 1000 % 60))
+        if not ok or not name:
+            return
+
+        bookmarks = [bookmark for bookmark in self.bookmarks.get(url, []) if bookmark[0] != name]
+        bookmarks.append((name, position))
+        bookmarks.sort(key=lambda bookmark: bookmark[1])
+        self.bookmarks[url] = bookmarks
+        self.playListWidget.setBookmarks(bookmarks)
+        self.persistence.submit("addBookmark", url, name, position)
+
+    def clearBookmarks(self):
+        url = self.currentUrl()
+        if url is None:
+            return
+
+        self.bookmarks.pop(url, None)
+        self.playListWidget.setBookmarks([])
+        self.persistence.submit("removeBookmark", url)
+
+    def playListLoaded(self, tracks):
+        self.playListWidget.addTracks(tracks)
+        self.playOrder.extend(len(tracks))
+
+        if self.restoreMusic is not None and self.restoreMusic < len(self.playOrder):
+            self.setCurrentMusic(self.playOrder.setCurrent(self.restoreMusic))
+            self.restoreMusic = None
+
+    def orderLoaded(self, order):
+        self.loadedOrder = order
+
+    def playListFinished(self):
+        self.playListLoading = False
+        self.restoreMusic = None
+        if self.loadedOrder and self.playOrder.shuffle.enabled:
+            if not self.playOrder.shuffle.fromBytes(self.loadedOrder, len(self.playOrder)):
+                self.playOrder.shuffle.shuffle(self.playOrder.current)
+        self.loadedOrder = None
+        self.prefetchUpcoming()
+        self.scanMetadata(range(len(self.playOrder)))
+        if self.pendingTracks:
+            self.addTracks(self.pendingTracks)
+            self.pendingTracks = []
 
     def setWindowTitle(self, title):
         if not title.startswith("IPlayer"):
@@ -314,45 +702,88 @@ class Window(QMainWindow):
         else:
             super().setWindowTitle(title)
 
+    def estimatedPosition(self):
+        position, at = self.lastPosition
+        if self.mediaPlayer.state() != PlaybackBackend.PlayingState:
+            return position
+
+        return min(position + int((time.perf_counter() - at) * 1000), self.mediaPlayer.duration())
+
+    def updateIdle(self):
+        idle = self.isMinimized() or not self.isVisible()
+        if idle == self.idle:
+            return
+
+        self.idle = idle
+        print(f"{'visible' if idle else 'idle'}: {self.wakeups.restart():.1f} wakeups/s")
+        # still shorter than preloadTime, so the next track is preloaded in time
+        self.mediaPlayer.setNotifyInterval(self.idleInterval if idle else self.visibleInterval)
+        if not idle:
+            position = self.estimatedPosition()
+            self.playerWidget.setPosition(position)
+            if self.taskBarProgress is not None:
+                self.taskBarProgress.setValue(position)
+
+    def changeEvent(self, event):
+        if event.type() == QEvent.WindowStateChange:
+            self.updateIdle()
+        super().changeEvent(event)
+
+    def hideEvent(self, event):
+        self.updateIdle()
+        super().hideEvent(event)
+
     def showEvent(self, event):
-        self.taskBarButton = QWinTaskbarButton(self)
-        self.taskBarButton.setWindow(self.windowHandle())
-        # self.taskBarButton.setOverlayIcon(QIcon(":/icon/disk.svg"))
+        if QWinTaskbarButton is not None:
+            self.taskBarButton = QWinTaskbarButton(self)
+            self.taskBarButton.setWindow(self.windowHandle())
+            # self.taskBarButton.setOverlayIcon(QIcon(":/icon/disk.svg"))
 
-        self.taskBarProgress = self.taskBarButton.progress()
-        self.taskBarProgress.setVisible(True)
+            self.taskBarProgress = self.taskBarButton.progress()
+            self.taskBarProgress.setVisible(True)
 
-        self.thumbnailToolBar = QWinThumbnailToolBar(self)
-        self.thumbnailToolBar.setWindow(self.windowHandle())
+            self.thumbnailToolBar = QWinThumbnailToolBar(self)
+            self.thumbnailToolBar.setWindow(self.windowHandle())
 
-        self.thumbnailPreviousButton = QWinThumbnailToolButton(self.thumbnailToolBar)
-        self.thumbnailPreviousButton.setIcon(QIcon(":/icon/previousw.png"))
-        self.thumbnailPreviousButton.clicked.connect(self.previousMusic)
+            self.thumbnailPreviousButton = QWinThumbnailToolButton(self.thumbnailToolBar)
+            self.thumbnailPreviousButton.setIcon(QIcon(":/icon/previousw.png"))
+            self.thumbnailPreviousButton.clicked.connect(self.previousMusic)
 
-        self.thumbnailPlayButton = QWinThumbnailToolButton(self.thumbnailToolBar)
-        self.thumbnailPlayButton.setIcon(QIcon(":/icon/playw.png"))
-        self.thumbnailPlayButton.clicked.connect(self.play)
+            self.thumbnailPlayButton = QWinThumbnailToolButton(self.thumbnailToolBar)
+            self.thumbnailPlayButton.setIcon(QIcon(":/icon/playw.png"))
+            self.thumbnailPlayButton.clicked.connect(self.play)
 
-        self.thumbnailNextButton = QWinThumbnailToolButton(self.thumbnailToolBar)
-        self.thumbnailNextButton.setIcon(QIcon(":/icon/nextw.png"))
-        self.thumbnailNextButton.clicked.connect(self.nextMusic)
+            self.thumbnailNextButton = QWinThumbnailToolButton(self.thumbnailToolBar)
+            self.thumbnailNextButton.setIcon(QIcon(":/icon/nextw.png"))
+            self.thumbnailNextButton.clicked.connect(self.nextMusic)
 
-        self.thumbnailToolBar.addButton(self.thumbnailPreviousButton)
-        self.thumbnailToolBar.addButton(self.thumbnailPlayButton)
-        self.thumbnailToolBar.addButton(self.thumbnailNextButton)
+            self.thumbnailToolBar.addButton(self.thumbnailPreviousButton)
+            self.thumbnailToolBar.addButton(self.thumbnailPlayButton)
+            self.thumbnailToolBar.addButton(self.thumbnailNextButton)
 
         self.captureKey.start()
+        self.updateIdle()
 
 
     def closeEvent(self, event):
-        if not QDir().exists(QDir.homePath()+"/.iplayer"):
-            QDir().mkdir(QDir.homePath()+"/.iplayer")
-        self.mediaPlayer.playlist().save(QUrl.fromLocalFile(QDir.homePath()+"/.iplayer/playlist.db"), "m3u")
+        if self.playListLoading:
+            self.playListLoader.requestInterruption()
+            self.playListLoader.wait()
+
+        for scanner in self.folderScanners + self.stoppingScanners + [self.metadataScanner]:
+            if scanner is not None:
+                scanner.requestInterruption()
+                scanner.wait()
+
+        if self.orderTimer.isActive():
+            self.saveOrder()
+
+        if self.resumePosition is None:
+            self.rememberPosition(self.currentUrl(), self.mediaPlayer.position())
+        self.savePositions()
 
-        settings().setValue("volume", self.mediaPlayer.volume())
-        settings().setValue("currentMusic", self.mediaPlayer.playlist().currentIndex())
-        settings().setValue("playbackMode", self.mediaPlayer.playlist().playbackMode())
-        settings().sync()
+        self.prefetcher.stop()
+        self.persistence.stop()
         qApp.quit()
 
 if __name__ == "__main__":
@@ -0,0 +1,229 @@
+import os
+import sqlite3
+import time
+from PyQt5.QtCore import QThread, pyqtSignal
+from playlist import Track, readPlayList, urlToPath
+
+
+DEFAULT_PLAYLIST = "default"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS tracks (
+    id INTEGER PRIMARY KEY,
+    url TEXT NOT NULL UNIQUE,
+    path TEXT,
+    title TEXT,
+    artist TEXT,
+    album TEXT,
+    duration INTEGER,
+    added REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS tracks_path ON tracks(path);
+CREATE INDEX IF NOT EXISTS tracks_title ON tracks(title);
+CREATE INDEX IF NOT EXISTS tracks_artist ON tracks(artist);
+CREATE INDEX IF NOT EXISTS tracks_duration ON tracks(duration);
+
+CREATE TABLE IF NOT EXISTS playlists (
+    id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL UNIQUE
+);
+
+CREATE TABLE IF NOT EXISTS playlist_items (
+    playlist INTEGER NOT NULL REFERENCES playlists(id) ON DELETE CASCADE,
+    position INTEGER NOT NULL,
+    track INTEGER NOT NULL REFERENCES tracks(id),
+    PRIMARY KEY (playlist, position)
+) WITHOUT ROWID;
+
+CREATE TABLE IF NOT EXISTS playlist_orders (
+    playlist INTEGER PRIMARY KEY REFERENCES playlists(id) ON DELETE CASCADE,
+    shuffle BLOB
+);
+
+CREATE TABLE IF NOT EXISTS resume_positions (
+    track INTEGER PRIMARY KEY REFERENCES tracks(id) ON DELETE CASCADE,
+    position INTEGER NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS bookmarks (
+    track INTEGER NOT NULL REFERENCES tracks(id) ON DELETE CASCADE,
+    name TEXT NOT NULL,
+    position INTEGER NOT NULL,
+    PRIMARY KEY (track, name)
+) WITHOUT ROWID;
+"""
+
+
+class Library:
+    def __init__(self, path):
+        self.connection = sqlite3.connect(path, timeout=10)
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.execute("PRAGMA synchronous=NORMAL")
+        self.connection.execute("PRAGMA foreign_keys=ON")
+        with self.connection:
+            self.connection.executescript(SCHEMA)
+        self.playListIds = {}
+
+    def close(self):
+        self.connection.close()
+
+    def playListId(self, name=DEFAULT_PLAYLIST):
+        if name not in self.playListIds:
+            with self.connection:
+                self.connection.execute("INSERT OR IGNORE INTO playlists(name) VALUES (?)", (name,))
+            self.playListIds[name] = self.connection.execute("SELECT id FROM playlists WHERE name = ?",
+                                                             (name,)).fetchone()[0]
+
+        return self.playListIds[name]
+
+    def count(self, playList=DEFAULT_PLAYLIST):
+        return self.connection.execute("SELECT count(*) FROM playlist_items WHERE playlist = ?",
+                                       (self.playListId(playList),)).fetchone()[0]
+
+    def iterTracks(self, playList=DEFAULT_PLAYLIST):
+        cursor = self.connection.execute(
+            "SELECT t.url, t.duration, t.title, t.artist, t.album, t.added FROM playlist_items i "
+            "JOIN tracks t ON t.id = i.track WHERE i.playlist = ? ORDER BY i.position", (self.playListId(playList),))
+        for url, duration, title, artist, album, added in cursor:
+            yield Track(url, duration=duration, title=title, artist=artist, album=album, added=added)
+
+    def addTracks(self, tracks, playList=DEFAULT_PLAYLIST):
+        playListId = self.playListId(playList)
+        with self.connection:
+            self.__insertTracks(tracks)
+            position = self.connection.execute(
+                "SELECT coalesce(max(position) + 1, 0) FROM playlist_items WHERE playlist = ?",
+                (playListId,)).fetchone()[0]
+            self.connection.executemany(
+                "INSERT INTO playlist_items(playlist, position, track) SELECT ?, ?, id FROM tracks WHERE url = ?",
+                ((playListId, position + i, track.url) for i, track in enumerate(tracks)))
+
+    def setTracks(self, tracks, playList=DEFAULT_PLAYLIST):
+        playListId = self.playListId(playList)
+        with self.connection:
+            self.__insertTracks(tracks)
+            self.connection.execute("DELETE FROM playlist_items WHERE playlist = ?", (playListId,))
+            self.connection.executemany(
+                "INSERT INTO playlist_items(playlist, position, track) SELECT ?, ?, id FROM tracks WHERE url = ?",
+                ((playListId, i, track.url) for i, track in enumerate(tracks)))
+
+    def setDuration(self, url, duration):
+        with self.connection:
+            self.connection.execute("UPDATE tracks SET duration = ? WHERE url = ?", (duration, url))
+
+    def order(self, playList=DEFAULT_PLAYLIST):
+        row = self.connection.execute("SELECT shuffle FROM playlist_orders WHERE playlist = ?",
+                                      (self.playListId(playList),)).fetchone()
+        return row[0] if row else None
+
+    def setOrder(self, data, playList=DEFAULT_PLAYLIST):
+        with self.connection:
+            self.connection.execute("INSERT OR REPLACE INTO playlist_orders(playlist, shuffle) VALUES (?, ?)",
+                                    (self.playListId(playList), data))
+
+    def setMetadata(self, rows):
+        with self.connection:
+            self.connection.executemany(
+                "UPDATE tracks SET duration = ?, title = ?, artist = ?, album = ? WHERE url = ?",
+                ((duration, title, artist, album, url) for url, duration, title, artist, album in rows))
+
+    def positions(self):
+        return dict(self.connection.execute(
+            "SELECT t.url, r.position FROM resume_positions r JOIN tracks t ON t.id = r.track"))
+
+    def setPositions(self, rows):
+        # rows of (url, position), a position of 0 forgets the track
+        rows = list(rows)
+        with self.connection:
+            self.connection.executemany(
+                "DELETE FROM resume_positions WHERE track = (SELECT id FROM tracks WHERE url = ?)",
+                ((url,) for url, position in rows if not position))
+            self.connection.executemany(
+                "INSERT OR REPLACE INTO resume_positions(track, position) SELECT id, ? FROM tracks WHERE url = ?",
+                ((position, url) for url, position in rows if position))
+
+    def bookmarks(self):
+        bookmarks = {}
+        for url, name, position in self.connection.execute(
+                "SELECT t.url, b.name, b.position FROM bookmarks b JOIN tracks t ON t.id = b.track "
+                "ORDER BY b.track, b.position"):
+            bookmarks.setdefault(url, []).append((name, position))
+
+        return bookmarks
+
+    def addBookmark(self, url, name, position):
+        with self.connection:
+            self.connection.execute(
+                "INSERT OR REPLACE INTO bookmarks(track, name, position) SELECT id, ?, ? FROM tracks WHERE url = ?",
+                (name, position, url))
+
+    def removeBookmark(self, url, name=None):
+        # without a name every bookmark of the track goes
+        with self.connection:
+            if name is None:
+                self.connection.execute("DELETE FROM bookmarks WHERE track = (SELECT id FROM tracks WHERE url = ?)",
+                                        (url,))
+            else:
+                self.connection.execute(
+                    "DELETE FROM bookmarks WHERE track = (SELECT id FROM tracks WHERE url = ?) AND name = ?",
+                    (url, name))
+
+    def importM3u(self, path, playList=DEFAULT_PLAYLIST):
+        tracks = list(readPlayList(path))
+        self.addTracks(tracks, playList)
+        return len(tracks)
+
+    def exportM3u(self, path, playList=DEFAULT_PLAYLIST):
+        with open(path, "w", encoding="utf-8") as file:
+            file.write("#EXTM3U\n")
+            for track in self.iterTracks(playList):
+                file.write(track.url + "\n")
+
+    def __insertTracks(self, tracks):
+        added = time.time()
+        self.connection.executemany(
+            "INSERT OR IGNORE INTO tracks(url, path, duration, added) VALUES (?, ?, ?, ?)",
+            ((track.url, urlToPath(track.url), track.duration, track.added or added) for track in tracks))
+
+
+class PlayListLoader(QThread):
+
+    positionsLoaded = pyqtSignal(dict, dict)
+    tracksLoaded = pyqtSignal(list)
+    orderLoaded = pyqtSignal(bytes)
+
+    def __init__(self, path, legacyPath=None, batchSize=2000, parent=None):
+        super().__init__(parent)
+        self.path = path
+        self.legacyPath = legacyPath
+        self.batchSize = batchSize
+
+    def run(self):
+        library = Library(self.path)
+        try:
+            if self.legacyPath and os.path.exists(self.legacyPath) and library.count() == 0:
+                # one-time migration of the old m3u playlist.db
+                library.importM3u(self.legacyPath)
+                os.replace(self.legacyPath, os.path.splitext(self.legacyPath)[0] + ".m3u")
+
+            # before the tracks, so restoring the current track can resume it
+            self.positionsLoaded.emit(library.positions(), library.bookmarks())
+            batch = []
+            for track in library.iterTracks():
+                if self.isInterruptionRequested():
+                    return
+
+                batch.append(track)
+                if len(batch) >= self.batchSize:
+                    self.tracksLoaded.emit(batch)
+                    batch = []
+
+            if batch:
+                self.tracksLoaded.emit(batch)
+
+            order = library.order()
+            if order:
+                self.orderLoaded.emit(order)
+
+        finally:
+            library.close()
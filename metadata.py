@@ -0,0 +1,180 @@
+import os
+import sqlite3
+import time
+from concurrent.futures import ThreadPoolExecutor
+from itertools import chain, islice
+from PyQt5.QtCore import QThread, pyqtSignal
+from playlist import urlToPath
+from probe import probe
+
+try:
+    import mutagen
+
+except ImportError:
+    mutagen = None
+
+
+class Metadata:
+
+    __slots__ = ("duration", "title", "artist", "album", "bitrate", "codec")
+
+    def __init__(self, duration=None, title=None, artist=None, album=None, bitrate=None, codec=None):
+        self.duration = duration
+        self.title = title
+        self.artist = artist
+        self.album = album
+        self.bitrate = bitrate
+        self.codec = codec
+
+
+def readMetadata(path):
+    info = probe(path)
+    metadata = Metadata(info.duration, bitrate=info.bitrate, codec=info.codec) if info else None
+    if mutagen is None:
+        return metadata
+
+    try:
+        audio = mutagen.File(path, easy=True)
+
+    except Exception:
+        return metadata
+
+    if audio is None:
+        return metadata
+
+    tags = audio.tags or {}
+
+    def tag(key):
+        try:
+            values = tags.get(key)
+
+        except (KeyError, ValueError):
+            return None
+
+        return str(values[0]) if values else None
+
+    if metadata is None:
+        length = getattr(audio.info, "length", None)
+        metadata = Metadata(int(length * 1000) if length else None,
+                            bitrate=getattr(audio.info, "bitrate", None) or None, codec=type(audio).__name__.lower())
+
+    metadata.title = tag("title")
+    metadata.artist = tag("artist")
+    metadata.album = tag("album")
+    return metadata
+
+
+def fileKey(path):
+    try:
+        stat = os.stat(path)
+
+    except OSError:
+        return None
+
+    return stat.st_size, stat.st_mtime_ns
+
+
+class MetadataCache:
+
+    FIELDS = Metadata.__slots__
+
+    def __init__(self, path, maxEntries=200000):
+        self.maxEntries = maxEntries
+        self.connection = sqlite3.connect(path, timeout=10)
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.execute("PRAGMA synchronous=NORMAL")
+        with self.connection:
+            self.connection.execute(
+                "CREATE TABLE IF NOT EXISTS metadata (path TEXT PRIMARY KEY, size INTEGER, mtime INTEGER, "
+                "duration INTEGER, title TEXT, artist TEXT, album TEXT, bitrate INTEGER, codec TEXT, used REAL)")
+            self.connection.execute("CREATE INDEX IF NOT EXISTS metadata_used ON metadata(used)")
+
+    def close(self):
+        self.connection.close()
+
+    def lookup(self, items):
+        # items are (path, (size, mtime)) pairs, entries whose file changed are treated as misses
+        keys = dict(items)
+        found = {}
+        paths = list(keys)
+        for start in range(0, len(paths), 500):
+            chunk = paths[start:start + 500]
+            cursor = self.connection.execute(
+                "SELECT path, size, mtime, {} FROM metadata WHERE path IN ({})".format(
+                    ", ".join(self.FIELDS), ", ".join("?" * len(chunk))), chunk)
+            for path, size, mtime, *fields in cursor:
+                if keys[path] == (size, mtime):
+                    found[path] = Metadata(*fields)
+
+        if found:
+            with self.connection:
+                self.connection.executemany("UPDATE metadata SET used = ? WHERE path = ?",
+                                            ((time.time(), path) for path in found))
+
+        return found
+
+    def store(self, entries):
+        # entries are (path, (size, mtime), metadata) triples
+        with self.connection:
+            self.connection.executemany(
+                "INSERT OR REPLACE INTO metadata VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                ((path, key[0], key[1], *(getattr(metadata, field) for field in self.FIELDS), time.time())
+                 for path, key, metadata in entries))
+
+    def evict(self):
+        count = self.connection.execute("SELECT count(*) FROM metadata").fetchone()[0]
+        if count > self.maxEntries:
+            with self.connection:
+                self.connection.execute(
+                    "DELETE FROM metadata WHERE path IN (SELECT path FROM metadata ORDER BY used LIMIT ?)",
+                    (count - self.maxEntries,))
+
+
+class MetadataScanner(QThread):
+
+    metadataLoaded = pyqtSignal(list)
+
+    def __init__(self, tracks, rows, cachePath=None, workers=4, batchSize=256, parent=None):
+        super().__init__(parent)
+        # rows is a list of ranges or lists of rows, only tracks still without a duration are read
+        self.tracks = tracks
+        self.rows = rows
+        self.cachePath = cachePath
+        self.workers = workers
+        self.batchSize = batchSize
+
+    def run(self):
+        # the playlist is walked and its urls turned into paths here, not on the GUI thread
+        tracks = list(self.tracks)
+        items = ((row, urlToPath(tracks[row].url)) for row in chain.from_iterable(self.rows)
+                 if tracks[row].duration is None)
+        items = ((row, path) for row, path in items if path)
+        cache = MetadataCache(self.cachePath) if self.cachePath else None
+        try:
+            with ThreadPoolExecutor(self.workers) as executor:
+                while not self.isInterruptionRequested():
+                    batch = list(islice(items, self.batchSize))
+                    if not batch:
+                        break
+
+                    paths = [path for _, path in batch]
+                    keys = dict(zip(paths, executor.map(fileKey, paths)))
+                    found = cache.lookup([(path, key) for path, key in keys.items() if key]) if cache else {}
+
+                    missing = [path for path, key in keys.items() if key and path not in found]
+                    read = {path: metadata or Metadata() for path, metadata in
+                            zip(missing, executor.map(readMetadata, missing))}
+                    if cache:
+                        cache.store([(path, keys[path], metadata) for path, metadata in read.items()])
+
+                    found.update(read)
+                    batch = [(row, found[path]) for row, path in batch if path in found]
+                    if batch:
+                        self.metadataLoaded.emit(batch)
+
+            if cache and not self.isInterruptionRequested():
+                cache.evict()
+
+        finally:
+            if cache:
+                cache.close()
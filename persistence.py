@@ -0,0 +1,69 @@
+import os
+import queue
+import time
+from PyQt5.QtCore import QThread
+from library import Library
+
+
+def writeAtomic(path, data):
+    temp = path + ".tmp"
+    with open(temp, "wb") as file:
+        file.write(data)
+        file.flush()
+        os.fsync(file.fileno())
+    os.replace(temp, path)
+
+
+class PersistenceService(QThread):
+
+    def __init__(self, libraryPath, settings, interval=3, parent=None):
+        super().__init__(parent)
+        self.libraryPath = libraryPath
+        self.settings = settings
+        self.interval = interval
+        self.jobs = queue.Queue()
+
+    def submit(self, method, *args):
+        self.jobs.put((method, args))
+
+    def stop(self):
+        self.jobs.put(None)
+        self.wait()
+
+    def run(self):
+        library = Library(self.libraryPath)
+        lastWrite = time.monotonic()
+        try:
+            while True:
+                timeout = max(0, self.interval - (time.monotonic() - lastWrite))
+                try:
+                    job = self.jobs.get(timeout=timeout)
+
+                except queue.Empty:
+                    job = False
+
+                if job is None:
+                    break
+
+                if job:
+                    method, args = job
+                    try:
+                        getattr(library, method)(*args)
+
+                    except Exception as err:
+                        print(method, err)
+
+                if time.monotonic() - lastWrite >= self.interval:
+                    self.__syncSettings()
+                    lastWrite = time.monotonic()
+
+        finally:
+            self.__syncSettings()
+            library.close()
+
+    def __syncSettings(self):
+        try:
+            self.settings.sync()
+
+        except OSError as err:
+            print(err)
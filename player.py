@@ -0,0 +1,239 @@
+import math
+import time
+from collections import deque
+from PyQt5.QtCore import QTimer, QUrl, Qt
+from PyQt5.QtMultimedia import QMediaContent, QMediaPlayer
+from backend import PlaybackBackend
+
+
+def mediaContent(url):
+    return QMediaContent(QUrl(url)) if url else QMediaContent()
+
+
+class DualPlayer(PlaybackBackend):
+    # the QMediaPlayer backend
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        # the active player plays, the other one preloads the next track
+        self.players = [QMediaPlayer(self), QMediaPlayer(self)]
+        self.active = 0
+        self.preloaded = None
+        self.switchedAt = None
+        self.baseVolume = 100
+        self.fadeTick = None
+        self.fadeProgress = 0.0
+        self.fadeLength = 0
+        # ms between a switch to the preloaded player and its audio starting
+        self.gaps = deque(maxlen=100)
+
+        self.endTimer = QTimer(self)
+        self.endTimer.setSingleShot(True)
+        self.endTimer.setTimerType(Qt.PreciseTimer)
+        self.endTimer.timeout.connect(self.switchToPreloaded)
+
+        # the ramp runs on the GUI thread like the players it sets the volume of, so a stalled event loop
+        # delays its ticks; a step never covers more than maxFadeStep ms, the fade is stretched instead of jumping
+        # and at worst outlasts the outgoing track, which then falls silent before its volume reaches 0
+        self.maxFadeStep = 40
+        self.fadeTimer = QTimer(self)
+        self.fadeTimer.setInterval(20)
+        self.fadeTimer.setTimerType(Qt.PreciseTimer)
+        self.fadeTimer.timeout.connect(self.__fadeStep)
+
+        for player in self.players:
+            for name in ("audioAvailableChanged", "durationChanged", "mutedChanged", "seekableChanged",
+                         "stateChanged", "error"):
+                getattr(player, name).connect(
+                    lambda *args, player=player, name=name: self.__forward(player, name, *args))
+            player.currentMediaChanged.connect(
+                lambda media, player=player: self.__forward(player, "currentMediaChanged",
+                                                            media.canonicalUrl().toString()))
+            player.positionChanged.connect(lambda position, player=player: self.__positionChanged(player, position))
+            player.mediaStatusChanged.connect(lambda status, player=player: self.__mediaStatusChanged(player, status))
+
+    def player(self):
+        return self.players[self.active]
+
+    def nextPlayer(self):
+        return self.players[1 - self.active]
+
+    def setMedia(self, url):
+        self.__finishFade()
+        self.cancelPreload()
+        self.player().setMedia(mediaContent(url))
+
+    def currentUrl(self):
+        return self.player().currentMedia().canonicalUrl().toString()
+
+    def play(self):
+        self.player().play()
+
+    def pause(self):
+        self.endTimer.stop()
+        self.__finishFade()
+        self.player().pause()
+
+    def stop(self):
+        self.endTimer.stop()
+        self.__finishFade()
+        self.player().stop()
+
+    def state(self):
+        return self.player().state()
+
+    def position(self):
+        return self.player().position()
+
+    def setPosition(self, position):
+        self.endTimer.stop()
+        self.__finishFade()
+        self.player().setPosition(position)
+
+    def duration(self):
+        return self.player().duration()
+
+    def volume(self):
+        return self.baseVolume
+
+    def setVolume(self, volume):
+        if volume == self.baseVolume:
+            return
+
+        self.baseVolume = volume
+        if self.fadeTick is not None:
+            self.__fadeStep()
+
+        else:
+            for player in self.players:
+                player.setVolume(volume)
+        self.volumeChanged.emit(volume)
+
+    def notifyInterval(self):
+        return self.player().notifyInterval()
+
+    def setNotifyInterval(self, interval):
+        for player in self.players:
+            player.setNotifyInterval(interval)
+
+    def setCrossfade(self, crossfade):
+        super().setCrossfade(crossfade)
+        self.__scheduleSwitch()
+
+    def isMuted(self):
+        return self.player().isMuted()
+
+    def setMuted(self, muted):
+        for player in self.players:
+            player.setMuted(muted)
+
+    def availableMetaData(self):
+        return self.player().availableMetaData()
+
+    def metaData(self, key):
+        return self.player().metaData(key)
+
+    def preload(self, url):
+        # opens and prerolls the next track on the idle player
+        self.__finishFade()
+        self.preloaded = url
+        self.nextPlayer().setMedia(mediaContent(url))
+        self.nextPlayer().pause()
+        self.__scheduleSwitch()
+
+    def cancelPreload(self):
+        self.endTimer.stop()
+        if self.preloaded is not None:
+            self.preloaded = None
+            self.nextPlayer().stop()
+            self.nextPlayer().setMedia(QMediaContent())
+
+    def switchToPreloaded(self):
+        if self.preloaded is None:
+            return False
+
+        self.endTimer.stop()
+        self.__finishFade()
+        previous, player = self.player(), self.nextPlayer()
+        remaining = previous.duration() - previous.position()
+        # swap first so signals of the outgoing player are no longer forwarded
+        self.active = 1 - self.active
+        self.preloaded = None
+        self.switchedAt = time.perf_counter()
+        # a late endTimer leaves too little of the outgoing track for a ramp of a few steps, it is cut then
+        if self.crossfade > 0 and previous.state() == QMediaPlayer.PlayingState and remaining >= 5 * self.maxFadeStep:
+            # both play until the ramp ends, the outgoing player is stopped then
+            self.fadeTick = time.perf_counter()
+            self.fadeProgress = 0.0
+            self.fadeLength = min(self.crossfade, remaining)
+            player.setVolume(0)
+            player.play()
+            self.fadeTimer.start()
+
+        else:
+            player.play()
+            previous.stop()
+            previous.setMedia(QMediaContent())
+
+        self.currentMediaChanged.emit(self.currentUrl())
+        self.durationChanged.emit(player.duration())
+        self.seekableChanged.emit(player.isSeekable())
+        self.stateChanged.emit(player.state())
+        self.audioAvailableChanged.emit(player.isAudioAvailable())
+        self.trackSwitched.emit()
+        return True
+
+    def __scheduleSwitch(self):
+        # start the preloaded track when the active one is predicted to end,
+        # EndOfMedia switches too if it comes first
+        remaining = self.duration() - self.position()
+        if self.preloaded is not None and self.state() == QMediaPlayer.PlayingState and remaining > 0:
+            self.endTimer.start(max(0, remaining - self.crossfade))
+
+    def __fadeStep(self):
+        # equal power: the summed power of both players stays constant through the ramp
+        now = time.perf_counter()
+        elapsed = min((now - self.fadeTick) * 1000, self.maxFadeStep)
+        self.fadeTick = now
+        self.fadeProgress = progress = min(1.0, self.fadeProgress + elapsed / self.fadeLength)
+        self.nextPlayer().setVolume(round(self.baseVolume * math.cos(progress * math.pi / 2)))
+        self.player().setVolume(round(self.baseVolume * math.sin(progress * math.pi / 2)))
+        if progress >= 1:
+            self.__finishFade()
+
+    def __finishFade(self):
+        if self.fadeTick is None:
+            return
+
+        self.fadeTimer.stop()
+        self.fadeTick = None
+        outgoing = self.nextPlayer()
+        outgoing.stop()
+        outgoing.setMedia(QMediaContent())
+        for player in self.players:
+            player.setVolume(self.baseVolume)
+
+    def __forward(self, player, name, *args):
+        if player is self.player():
+            getattr(self, name).emit(*args)
+
+    def __positionChanged(self, player, position):
+        if player is not self.player():
+            return
+
+        if self.switchedAt is not None and position > 0:
+            # the new track has been audible for position ms
+            self.gaps.append((time.perf_counter() - self.switchedAt) * 1000 - position)
+            self.switchedAt = None
+
+        if self.preloaded is not None:
+            self.__scheduleSwitch()
+        self.positionChanged.emit(position)
+
+    def __mediaStatusChanged(self, player, status):
+        if player is not self.player():
+            return
+
+        if status == QMediaPlayer.EndOfMedia and self.switchToPreloaded():
+            return
+
+        self.mediaStatusChanged.emit(status)
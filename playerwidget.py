@@ -1,18 +1,26 @@
-from PyQt5.QtWidgets import (QWidget, QHBoxLayout, QPushButton, QSlider, QVBoxLayout, QSpacerItem, QListWidget,
-                               QAbstractItemView, QListWidgetItem, QListView, QStyle, QSizePolicy, QLabel)
-from PyQt5.QtGui import QIcon
-from PyQt5.QtCore import Qt, QSize, pyqtSignal
+from PyQt5.QtWidgets import (QWidget, QHBoxLayout, QPushButton, QSlider, QVBoxLayout, QSpacerItem, QApplication,
+                               QAbstractItemView, QTableView, QHeaderView, QStyle, QSizePolicy, QStyledItemDelegate,
+                               QStyleOptionViewItem, QMenu, QLabel)
+from PyQt5.QtGui import QIcon, QPalette, QBrush
+from PyQt5.QtCore import Qt, QSize, QRect, QTimer, pyqtSignal, QAbstractListModel, QAbstractProxyModel, QModelIndex
+from array import array
+from bisect import bisect_left
+from playlist import trackKey, sortKey
+from search import SearchIndex, searchWords
 from settings import settings
 
 
 class MusicSlider(QSlider):
     def mousePressEvent(self, event):
+        # while the slider is down the player position no longer moves it, and setValue emits sliderMoved
+        self.setSliderDown(True)
         self.setValue(QStyle.sliderValueFromPosition(self.minimum(), self.maximum(), event.x(), self.width()))
-        self.sliderMoved.emit(int((event.x() / self.width()) * self.maximum()))
 
     def mouseMoveEvent(self, event):
         self.setValue(QStyle.sliderValueFromPosition(self.minimum(), self.maximum(), event.x(), self.width()))
-        self.sliderMoved.emit(int((event.x() / self.width()) * self.maximum()))
+
+    def mouseReleaseEvent(self, event):
+        self.setSliderDown(False)
 
 
 class Button(QPushButton):
@@ -117,7 +125,7 @@ class PlayerWidget(QWidget):
         self.volumeSlider.valueChanged.connect(lambda : self.volumeChanged.emit(self.volumeSlider.value()))
         self.volumeSlider.setMaximum(100)
         self.volumeSlider.setOrientation(Qt.Horizontal)
-        self.volumeSlider.setValue(int(settings().value("volume") or 100))
+        self.volumeSlider.setValue(settings().volume())
         self.volumeSlider.setStyleSheet("border: none;")
 
         self.buttonsLayout.addWidget(self.mutedButton)
@@ -131,14 +139,15 @@ class PlayerWidget(QWidget):
         self.showOrHidePlayList.clicked.connect(lambda: self.showOrHideClicked.emit())
         self.buttonsLayout.addWidget(self.showOrHidePlayList)
 
-        playback = int(settings().value("playbackMode") or 2)
-        self.repeatButtonStatus(playback)
+        self.repeatButtonStatus(settings().playbackMode())
+        self.mixedButtonStatus(settings().shuffle())
 
     def setDuration(self, duration):
         self.musicSlider.setMaximum(duration)
 
     def setPosition(self, position):
-        self.musicSlider.setValue(position)
+        if not self.musicSlider.isSliderDown():
+            self.musicSlider.setValue(position)
 
     def repeatButtonStatus(self, playback):
         if playback == 1:
@@ -153,6 +162,15 @@ class PlayerWidget(QWidget):
             self.repeatButton.setIcon(QIcon(":/icon/loop.png"))
             self.repeatButton.setButtonType("loop")
 
+    def mixedButtonStatus(self, shuffle):
+        if shuffle:
+            self.mixedButton.setIcon(QIcon(":/icon/shuffle_press.png"))
+            self.mixedButton.setButtonType("shuffle_press")
+
+        else:
+            self.mixedButton.setIcon(QIcon(":/icon/shuffle.png"))
+            self.mixedButton.setButtonType("shuffle")
+
     def playButtonStatus(self, status):
         if status == "pause":
             self.playOrStopButton.setIcon(QIcon(":/icon/play.png"))
@@ -172,26 +190,422 @@ class PlayerWidget(QWidget):
             self.mutedButton.setIcon(QIcon(":/icon/speaker.png"))
 
 
-class PlayListWidget(QListWidget):
+class PlayListModel(QAbstractListModel):
+
+    rowsPermuted = pyqtSignal(object)
+
+    DurationRole = Qt.UserRole + 1
+    CurrentRole = Qt.UserRole + 2
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.tracks = []
+        # the now playing row, painted by the delegate
+        self.currentRow = -1
+        # canonical path -> row of its first occurrence, built on first use
+        self.keys = None
+        # field -> sort key of every row, computed on the first sort by that field
+        self.sortKeys = {}
+
+    def rowCount(self, parent=QModelIndex()):
+        if parent.isValid():
+            return 0
+
+        return len(self.tracks)
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid():
+            return None
+
+        if role == Qt.DisplayRole:
+            return self.tracks[index.row()].name
+
+        elif role == self.DurationRole:
+            return self.tracks[index.row()].duration
+
+        elif role == self.CurrentRole:
+            return index.row() == self.currentRow
+
+        return None
+
+    def setCurrentRow(self, row):
+        # repaints only the previous and the new current row
+        previous = self.currentRow
+        self.currentRow = row if 0 <= row < len(self.tracks) else -1
+        for row in {previous, self.currentRow}:
+            if row >= 0:
+                index = self.index(row)
+                self.dataChanged.emit(index, index, [self.CurrentRole])
+
+    def flags(self, index):
+        if not index.isValid():
+            return Qt.ItemIsDropEnabled
+
+        return Qt.ItemIsEnabled | Qt.ItemIsSelectable
+
+    def addTracks(self, tracks):
+        if not tracks:
+            return
+
+        row = len(self.tracks)
+        self.beginInsertRows(QModelIndex(), row, row + len(tracks) - 1)
+        self.tracks.extend(tracks)
+        if self.keys is not None:
+            self.__indexTracks(tracks, row)
+        for field, keys in self.sortKeys.items():
+            keys.extend(sortKey(track, field) for track in tracks)
+        self.endInsertRows()
+
+    def sortBy(self, field, descending=False):
+        # stable sort, returns the old row -> new row mapping
+        keys = self.sortKeys.get(field)
+        if keys is None:
+            keys = self.sortKeys[field] = [sortKey(track, field) for track in self.tracks]
+
+        order = sorted(range(len(self.tracks)), key=keys.__getitem__, reverse=descending)
+        mapping = array("I", [0]) * len(order)
+        for row, old in enumerate(order):
+            mapping[old] = row
+
+        self.layoutAboutToBeChanged.emit()
+        # in place, the search index holds on to this list
+        self.tracks[:] = [self.tracks[old] for old in order]
+        for keys in self.sortKeys.values():
+            keys[:] = [keys[old] for old in order]
+        if self.currentRow >= 0:
+            self.currentRow = mapping[self.currentRow]
+        if self.keys is not None:
+            self.keys = {key: mapping[row] for key, row in self.keys.items()}
+        self.rowsPermuted.emit(mapping)
+
+        indexes = self.persistentIndexList()
+        self.changePersistentIndexList(indexes, [self.index(mapping[index.row()]) for index in indexes])
+        self.layoutChanged.emit()
+        return mapping
+
+    def pathIndex(self):
+        if self.keys is None:
+            self.keys = {}
+            self.__indexTracks(self.tracks, 0)
+
+        return self.keys
+
+    def duplicateCount(self):
+        return len(self.tracks) - len(self.pathIndex())
+
+    def uniqueTracks(self, tracks):
+        # drops tracks already in the playlist and repeats within the batch
+        keys = self.pathIndex()
+        seen = set()
+        unique = []
+        for track in tracks:
+            key = trackKey(track.url)
+            if key not in keys and key not in seen:
+                seen.add(key)
+                unique.append(track)
+
+        return unique
+
+    def removeDuplicates(self):
+        # returns an old row -> new row mapping, removed rows map to the row of the kept copy
+        if not self.duplicateCount():
+            return None
+
+        keys = self.keys
+        keep = bytearray(len(self.tracks))
+        for row in keys.values():
+            keep[row] = 1
+
+        mapping = array("I", [0]) * len(self.tracks)
+        tracks = []
+        for row, track in enumerate(self.tracks):
+            if keep[row]:
+                mapping[row] = len(tracks)
+                tracks.append(track)
+
+        # after a sort the kept copy may come after the removed ones, so they are mapped in a second pass
+        for row, track in enumerate(self.tracks):
+            if not keep[row]:
+                mapping[row] = mapping[keys[trackKey(track.url)]]
+
+        self.beginResetModel()
+        self.tracks = tracks
+        if self.currentRow >= 0:
+            self.currentRow = mapping[self.currentRow]
+        self.keys = {key: mapping[row] for key, row in keys.items()}
+        self.sortKeys = {}
+        self.endResetModel()
+        return mapping
+
+    def __indexTracks(self, tracks, row):
+        keys = self.keys
+        for row, track in enumerate(tracks, row):
+            keys.setdefault(trackKey(track.url), row)
+
+    def insertDuration(self, row, duration):
+        if 0 <= row < len(self.tracks):
+            self.tracks[row].duration = duration
+            self.__updateSortKeys([row])
+            index = self.index(row)
+            self.dataChanged.emit(index, index, [self.DurationRole])
+
+    def setMetadata(self, batch):
+        changed = []
+        for row, metadata in batch:
+            track = self.tracks[row]
+            values = (metadata.duration or track.duration, metadata.title, metadata.artist, metadata.album)
+            if values != (track.duration, track.title, track.artist, track.album):
+                track.duration, track.title, track.artist, track.album = values
+                changed.append(row)
+
+        if changed:
+            self.__updateSortKeys(changed)
+            self.dataChanged.emit(self.index(min(changed)), self.index(max(changed)))
+
+        return changed
+
+    def __updateSortKeys(self, rows):
+        for field, keys in self.sortKeys.items():
+            for row in rows:
+                keys[row] = sortKey(self.tracks[row], field)
+
+
+class PlayListFilterModel(QAbstractProxyModel):
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.searchIndex = SearchIndex()
+        self.query = ""
+        # ascending source rows matching the query, None while no filter is set
+        self.rows = None
+
+        self.indexTimer = QTimer(self)
+        self.indexTimer.setInterval(0)
+        self.indexTimer.timeout.connect(self.indexPending)
+
+    def setSourceModel(self, model):
+        self.beginResetModel()
+        super().setSourceModel(model)
+        model.rowsAboutToBeInserted.connect(self.sourceRowsAboutToBeInserted)
+        model.rowsInserted.connect(self.sourceRowsInserted)
+        model.modelAboutToBeReset.connect(self.beginResetModel)
+        model.modelReset.connect(self.sourceModelReset)
+        model.dataChanged.connect(self.sourceDataChanged)
+        model.layoutAboutToBeChanged.connect(self.sourceLayoutAboutToBeChanged)
+        model.rowsPermuted.connect(self.sourceRowsPermuted)
+        model.layoutChanged.connect(self.sourceLayoutChanged)
+        self.sourceModelReset()
+
+    def setFilter(self, query):
+        self.query = query
+        rows = self.searchIndex.search(query)
+        if self.sameRows(rows):
+            # a keystroke that keeps the rows, like a first letter every track has, needs no reset
+            self.rows = rows
+            return
+
+        self.beginResetModel()
+        self.rows = rows
+        self.endResetModel()
+
+    def sameRows(self, rows):
+        if rows is None and self.rows is None:
+            return True
+
+        if rows is None or self.rows is None:
+            # filtered rows are ascending and unique, as many as the source has means all of them
+            return len(rows if rows is not None else self.rows) == self.sourceModel().rowCount()
+
+        return rows == self.rows
+
+    def indexPending(self):
+        # builds the search index in small steps while the event loop is idle
+        if not self.searchIndex.indexPending(200):
+            self.indexTimer.stop()
+
+    def index(self, row, column=0, parent=QModelIndex()):
+        if parent.isValid() or column != 0 or not 0 <= row < self.rowCount():
+            return QModelIndex()
+
+        return self.createIndex(row, column)
+
+    def parent(self, index=QModelIndex()):
+        return QModelIndex()
+
+    def rowCount(self, parent=QModelIndex()):
+        if parent.isValid():
+            return 0
+
+        return self.sourceModel().rowCount() if self.rows is None else len(self.rows)
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else 1
+
+    def mapToSource(self, index):
+        if not index.isValid():
+            return QModelIndex()
+
+        return self.sourceModel().index(index.row() if self.rows is None else self.rows[index.row()])
+
+    def mapFromSource(self, index):
+        if not index.isValid():
+            return QModelIndex()
+
+        if self.rows is None:
+            return self.createIndex(index.row(), 0)
+
+        row = bisect_left(self.rows, index.row())
+        if row < len(self.rows) and self.rows[row] == index.row():
+            return self.createIndex(row, 0)
+
+        return QModelIndex()
+
+    def sourceRowsAboutToBeInserted(self, parent, first, last):
+        if self.rows is None:
+            self.beginInsertRows(QModelIndex(), first, last)
+
+    def sourceRowsInserted(self, parent, first, last):
+        self.searchIndex.insert(first, last + 1)
+        self.indexTimer.start()
+        if self.rows is None:
+            self.endInsertRows()
+            return
+
+        # the playlist only appends, so matching rows go to the end of the filtered rows
+        self.searchIndex.indexPending()
+        rows = self.searchIndex.matches(range(first, last + 1), searchWords(self.query))
+        if rows:
+            self.beginInsertRows(QModelIndex(), len(self.rows), len(self.rows) + len(rows) - 1)
+            self.rows.extend(rows)
+            self.endInsertRows()
+
+    def sourceModelReset(self):
+        self.searchIndex.reset(self.sourceModel().tracks)
+        self.indexTimer.start()
+        self.rows = self.searchIndex.search(self.query)
+        self.endResetModel()
+
+    def sourceLayoutAboutToBeChanged(self):
+        self.beginResetModel()
+
+    def sourceRowsPermuted(self, mapping):
+        self.searchIndex.permute(mapping)
+        if self.rows is not None:
+            self.rows = sorted(mapping[row] for row in self.rows)
+
+    def sourceLayoutChanged(self):
+        self.endResetModel()
+
+    def sourceDataChanged(self, topLeft, bottomRight, roles):
+        if not roles or Qt.DisplayRole in roles:
+            self.searchIndex.update(topLeft.row(), bottomRight.row() + 1)
+            self.indexTimer.start()
+
+        if self.rows is None:
+            self.dataChanged.emit(self.createIndex(topLeft.row(), 0), self.createIndex(bottomRight.row(), 0), roles)
+            return
+
+        first = bisect_left(self.rows, topLeft.row())
+        last = bisect_left(self.rows, bottomRight.row() + 1) - 1
+        if first <= last:
+            self.dataChanged.emit(self.createIndex(first, 0), self.createIndex(last, 0), roles)
+
+
+class PlayListDelegate(QStyledItemDelegate):
+
+    padding = 8
+    durationWidth = 40
+    currentForeground = Qt.lightGray
+    currentBackground = Qt.darkGray
+
+    def paint(self, painter, option, index):
+        option = QStyleOptionViewItem(option)
+        self.initStyleOption(option, index)
+        text = option.text
+        option.text = ""
+        current = index.data(PlayListModel.CurrentRole)
+        if current:
+            option.backgroundBrush = QBrush(self.currentBackground)
+        style = option.widget.style() if option.widget else QApplication.style()
+        style.drawControl(QStyle.CE_ItemViewItem, option, painter, option.widget)
+
+        rect = option.rect.adjusted(self.padding, 0, -self.padding, 0)
+        width = max(self.durationWidth, option.fontMetrics.horizontalAdvance("00:00"))
+        durationRect = QRect(rect.right() - width, rect.top(), width, rect.height())
+        nameRect = rect.adjusted(0, 0, -(width + self.padding), 0)
+
+        painter.save()
+        if option.state & QStyle.State_Selected:
+            painter.setPen(option.palette.color(QPalette.HighlightedText))
+
+        elif current:
+            painter.setPen(self.currentForeground)
+
+        else:
+            painter.setPen(option.palette.color(QPalette.Text))
+
+        painter.drawText(nameRect, Qt.AlignLeft | Qt.AlignVCenter,
+                         option.fontMetrics.elidedText(text, Qt.ElideRight, nameRect.width()))
+        duration = index.data(PlayListModel.DurationRole)
+        if duration:
+            painter.drawText(durationRect, Qt.AlignRight | Qt.AlignVCenter, self.__duration2time(duration))
+        painter.restore()
+
+    def sizeHint(self, option, index):
+        return QSize(0, option.fontMetrics.height() + 2 * self.padding)
+
+    def __duration2time(self, duration):
+        m = duration/1000
+        time = "{:02d}:{:02d}".format(int(m/60), int(m%60))
+
+        return time
+
+
+class PlayListWidget(QTableView):
 
     musicDrop = pyqtSignal(list)
+    importClicked = pyqtSignal()
+    addFolderClicked = pyqtSignal()
+    playNextClicked = pyqtSignal(int)
+    exportClicked = pyqtSignal()
+    removeDuplicatesClicked = pyqtSignal()
+    skipDuplicatesToggled = pyqtSignal(bool)
+    sortClicked = pyqtSignal(str)
+    gaplessToggled = pyqtSignal(bool)
+    crossfadeChanged = pyqtSignal(int)
+    addBookmarkClicked = pyqtSignal()
+    bookmarkClicked = pyqtSignal(int)
+    clearBookmarksClicked = pyqtSignal()
 
     def __init__(self, parent):
         super().__init__()
         self.parent = parent
-        self.setDragEnabled(True)
-        self.setDefaultDropAction(Qt.MoveAction)
+        # (name, position) bookmarks of the current track
+        self.bookmarks = []
+        self.playListModel = PlayListModel(self)
+        self.filterModel = PlayListFilterModel(self)
+        self.filterModel.setSourceModel(self.playListModel)
+        self.setModel(self.filterModel)
+        self.setItemDelegate(PlayListDelegate(self))
+        # a table view with fixed row heights only touches the visible rows on a reset,
+        # a list view walks every row of the model to lay them out
+        self.horizontalHeader().hide()
+        self.horizontalHeader().setStretchLastSection(True)
+        self.verticalHeader().hide()
+        self.verticalHeader().setSectionResizeMode(QHeaderView.Fixed)
+        self.verticalHeader().setDefaultSectionSize(self.fontMetrics().height() + 2 * PlayListDelegate.padding)
+        self.setShowGrid(False)
+        self.setWordWrap(False)
+        self.setSelectionBehavior(QAbstractItemView.SelectRows)
+        self.setSelectionMode(QAbstractItemView.SingleSelection)
         self.setAcceptDrops(True)
-        self.setDragDropMode(QAbstractItemView.DragDrop)
-        self.setMovement(QListView.Free)
+        self.setDragDropMode(QAbstractItemView.DropOnly)
         # self.setHorizontalScrollBarPolicy(Qt.ScrollBarAlwaysOff)
 
 
     def dropEvent(self, event):
         # event.setDropAction(Qt.MoveAction)
         self.musicDrop.emit(event.mimeData().urls())
-        # event.accept()
-        super().dropEvent(event)
+        event.accept()
 
     def dragEnterEvent(self, event):
         event.accept()
@@ -205,58 +619,91 @@ class PlayListWidget(QListWidget):
         event.accept()
         # super().dragMoveEvent(event)
 
-    def addMusic(self, music):
-        item = QListWidgetItem()
+    def contextMenuEvent(self, event):
+        menu = QMenu(self)
+        index = self.indexAt(event.pos())
+        if index.isValid():
+            menu.addAction("Play next", lambda: self.playNextClicked.emit(self.row(index)))
+            menu.addSeparator()
+        menu.addAction("Add folder...", lambda: self.addFolderClicked.emit())
+        menu.addAction("Import playlist...", lambda: self.importClicked.emit())
+        menu.addAction("Export playlist...", lambda: self.exportClicked.emit())
+        menu.addSeparator()
+        sortMenu = menu.addMenu("Sort by")
+        for field, title in (("name", "File name"), ("title", "Title"), ("artist", "Artist"), ("album", "Album"),
+                             ("duration", "Duration"), ("added", "Date added")):
+            sortMenu.addAction(title, lambda field=field: self.sortClicked.emit(field))
+        skip = menu.addAction("Skip duplicates")
+        skip.setCheckable(True)
+        skip.setChecked(settings().skipDuplicates())
+        skip.toggled.connect(self.skipDuplicatesToggled.emit)
+        menu.addAction("Remove duplicates", lambda: self.removeDuplicatesClicked.emit())
+        menu.addSeparator()
+        gapless = menu.addAction("Gapless playback")
+        gapless.setCheckable(True)
+        gapless.setChecked(settings().gapless())
+        gapless.toggled.connect(self.gaplessToggled.emit)
+        crossfadeMenu = menu.addMenu("Crossfade")
+        for seconds in range(0, 13, 2):
+            action = crossfadeMenu.addAction(f"{seconds} s" if seconds else "Off",
+                                             lambda seconds=seconds: self.crossfadeChanged.emit(seconds))
+            action.setCheckable(True)
+            action.setChecked(settings().crossfade() == seconds)
+        menu.addSeparator()
+        bookmarkMenu = menu.addMenu("Bookmarks")
+        bookmarkMenu.addAction("Add bookmark...", lambda: self.addBookmarkClicked.emit())
+        if self.bookmarks:
+            bookmarkMenu.addSeparator()
+            for name, position in self.bookmarks:
+                bookmarkMenu.addAction("{} ({:02d}:{:02d})".format(name, position // 60000, position // 1000 % 60),
+                                       lambda position=position: self.bookmarkClicked.emit(position))
+            bookmarkMenu.addSeparator()
+            bookmarkMenu.addAction("Clear bookmarks", lambda: self.clearBookmarksClicked.emit())
+        menu.exec_(event.globalPos())
+
+    def row(self, item):
+        # view indexes belong to the filter model, map them back to playlist rows
+        if item.model() is self.filterModel:
+            item = self.filterModel.mapToSource(item)
+
+        return item.row()
+
+    def setFilter(self, query):
+        self.filterModel.setFilter(query)
+
+    def setCurrentRow(self, row):
+        self.playListModel.setCurrentRow(row)
+
+    def setBookmarks(self, bookmarks):
+        self.bookmarks = bookmarks
+
+    def addTracks(self, tracks):
+        self.playListModel.addTracks(tracks)
 
-        playListItem = PlayListItem(self)
-        playListItem.setText(music.fileName())
-        item.setSizeHint(playListItem.sizeHint())
-
-        self.addItem(item)
-        self.setItemWidget(item, playListItem)
-
-    def addMusics(self, musics):
-        for url in musics:
-            item = QListWidgetItem()
-            item.setTextAlignment(Qt.AlignLeft)
-
-            playListItem = PlayListItem(self)
-            playListItem.setText(url.fileName())
-            item.setSizeHint(playListItem.minimumSizeHint())
+    def insertDuration(self, index, duration):
+        self.playListModel.insertDuration(index, duration)
 
-            self.addItem(item)
-            self.setItemWidget(item, playListItem)
 
-    def insertDuration(self, index, duration):
-        item = self.itemWidget(self.item(index))
-        item.setDuration(duration)
+class ImportProgress(QWidget):
 
+    cancelClicked = pyqtSignal()
 
-class PlayListItem(QWidget):
     def __init__(self, parent):
         super().__init__()
         self.parent = parent
         self.setLayout(QHBoxLayout())
+        self.layout().setContentsMargins(8, 2, 8, 2)
 
-        self.itemNameLabel = QLabel(self)
-        self.itemNameLabel.setWordWrap(True)
-        self.layout().addWidget(self.itemNameLabel)
-        # self.layout().addSpacerItem(QSpacerItem(10, 5, QSizePolicy.Preferred, QSizePolicy.Preferred))
-
-        self.durationLabel = QLabel(self)
-        self.durationLabel.setFixedWidth(40)
-        self.durationLabel.setAlignment(Qt.AlignRight)
-        self.layout().addWidget(self.durationLabel)
-
-    def setText(self, text):
-        self.itemNameLabel.setText(text)
-
-    def setDuration(self, duration):
-        self.durationLabel.setText(self.__duration2time(duration))
+        self.progressLabel = QLabel(self)
+        self.layout().addWidget(self.progressLabel)
 
+        self.cancelButton = QPushButton("Cancel", self)
+        self.cancelButton.setFlat(True)
+        self.cancelButton.clicked.connect(lambda: self.cancelClicked.emit())
+        self.layout().addWidget(self.cancelButton)
 
-    def __duration2time(self, duration):
-        m = duration/1000
-        time = "{:02d}:{:02d}".format(int(m/60), int(m%60))
+        self.hide()
 
-        return time
\ No newline at end of file
+    def setProgress(self, scanned, found):
+        self.progressLabel.setText(f"Importing: {found} tracks in {scanned} files")
+        self.show()
@@ -0,0 +1,101 @@
+import os
+import re
+from pathlib import Path
+from urllib.parse import unquote, urlsplit
+
+
+class Track:
+
+    __slots__ = ("url", "name", "duration", "title", "artist", "album", "added")
+
+    def __init__(self, url, name=None, duration=None, title=None, artist=None, album=None, added=None):
+        self.url = url
+        self.name = name if name is not None else urlFileName(url)
+        self.duration = duration
+        self.title = title
+        self.artist = artist
+        self.album = album
+        self.added = added
+
+
+def urlFileName(url):
+    name = url.rsplit("/", 1)[-1]
+    if "%" in name:
+        name = unquote(name)
+
+    return name
+
+
+def urlToPath(url):
+    parts = urlsplit(url)
+    if parts.scheme != "file":
+        return None
+
+    path = unquote(parts.path)
+    if len(path) > 2 and path[0] == "/" and path[2] == ":":
+        path = path[1:]
+
+    return path
+
+
+def trackKey(url):
+    # canonical form used to detect the same file added twice under different spellings
+    if url.startswith("file:///"):
+        # fast path for the urls QUrl.fromLocalFile produces
+        path = url[7:]
+        if "%" in path:
+            path = unquote(path)
+        if len(path) > 2 and path[2] == ":":
+            path = path[1:]
+
+    else:
+        path = urlToPath(url)
+        if path is None:
+            return url
+
+    if "/." in path or "//" in path:
+        path = os.path.normpath(path)
+
+    return os.path.normcase(path)
+
+
+def naturalKey(text):
+    # digit runs compare as numbers, so "2 - x" sorts before "10 - x"
+    parts = re.split(r"(\d+)", text.casefold())
+    parts[1::2] = map(int, parts[1::2])
+    return tuple(parts)
+
+
+def sortKey(track, field):
+    if field == "name":
+        return naturalKey(track.name)
+
+    if field in ("title", "artist", "album"):
+        value = getattr(track, field)
+        return value is None, naturalKey(value) if value else ()
+
+    # duration and added, tracks without a value go last
+    value = getattr(track, field)
+    return value is None, value or 0
+
+
+def readPlayList(path):
+    try:
+        file = open(path, encoding="utf-8")
+
+    except OSError:
+        return
+
+    with file:
+        for line in file:
+            line = line.strip()
+            if not line or line.startswith("#"):
+                continue
+
+            if not line.startswith("file:") and len(urlsplit(line).scheme) < 2:
+                if not Path(line).is_absolute():
+                    continue
+                line = Path(line).as_uri()
+
+            yield Track(line)
+
@@ -0,0 +1,218 @@
+import random
+from array import array
+from collections import deque
+
+
+class ShuffleOrder:
+    def __init__(self):
+        self.enabled = False
+        self.order = array("I")
+        self.positions = array("I")
+
+    def __len__(self):
+        return len(self.order)
+
+    def reset(self, size):
+        self.order = array("I", range(size))
+        self.positions = array("I", range(size))
+
+    def shuffle(self, first=-1):
+        random.shuffle(self.order)
+        if 0 <= first < len(self.order):
+            position = self.order.index(first)
+            self.order[0], self.order[position] = self.order[position], self.order[0]
+        self.__updatePositions()
+
+    def extend(self, count):
+        start = len(self.order)
+        indexes = array("I", range(start, start + count))
+        if self.enabled:
+            random.shuffle(indexes)
+
+        self.order.extend(indexes)
+        self.positions.extend(range(start, start + count))
+        for position in range(start, start + count):
+            self.positions[self.order[position]] = position
+
+    def remap(self, mapping, size):
+        # mapping is old index -> new index, several old indexes may share one new index
+        seen = bytearray(size)
+        order = array("I")
+        for index in self.order:
+            index = mapping[index]
+            if not seen[index]:
+                seen[index] = 1
+                order.append(index)
+
+        self.order = order
+        self.__updatePositions()
+
+    def next(self, index, wrap=False):
+        if not 0 <= index < len(self.order):
+            return self.order[0] if self.order else -1
+
+        position = self.positions[index] + 1
+        if position < len(self.order):
+            return self.order[position]
+
+        return self.order[0] if wrap else -1
+
+    def previous(self, index, wrap=False):
+        if not 0 <= index < len(self.order):
+            return self.order[-1] if self.order else -1
+
+        position = self.positions[index] - 1
+        if position >= 0:
+            return self.order[position]
+
+        return self.order[-1] if wrap else -1
+
+    def toBytes(self):
+        return self.order.tobytes()
+
+    def fromBytes(self, data, size):
+        order = array("I")
+        if len(data) % order.itemsize:
+            return False
+
+        order.frombytes(data)
+        if len(order) != size or sorted(order) != list(range(size)):
+            return False
+
+        self.order = order
+        self.__updatePositions()
+        return True
+
+    def __updatePositions(self):
+        positions = array("I", bytes(len(self.order) * self.order.itemsize))
+        for position, index in enumerate(self.order):
+            positions[index] = position
+        self.positions = positions
+
+
+class PlayOrder:
+
+    CurrentItemInLoop = 1
+    Sequential = 2
+    Loop = 3
+
+    def __init__(self, historySize=1000):
+        self.size = 0
+        self.current = -1
+        self.mode = self.Sequential
+        self.shuffle = ShuffleOrder()
+        self.history = deque(maxlen=historySize)
+        self.queue = deque()
+
+    def __len__(self):
+        return self.size
+
+    def extend(self, count):
+        self.size += count
+        self.shuffle.extend(count)
+
+    def setCurrent(self, index):
+        if index != self.current and 0 <= self.current < self.size:
+            self.history.append(self.current)
+
+        self.current = index if 0 <= index < self.size else -1
+        return self.current
+
+    def playNext(self, index):
+        if 0 <= index < self.size:
+            self.queue.append(index)
+
+    def remap(self, mapping, size):
+        self.size = size
+        self.shuffle.remap(mapping, size)
+        self.current = mapping[self.current] if self.current >= 0 else -1
+        self.history = deque((mapping[index] for index in self.history if index < len(mapping)),
+                             maxlen=self.history.maxlen)
+        self.queue = deque(mapping[index] for index in self.queue if index < len(mapping))
+
+    def setShuffle(self, enabled):
+        self.shuffle.enabled = enabled
+        if enabled:
+            self.shuffle.shuffle(self.current)
+
+    def peekNext(self, auto=False):
+        # the index next() would move to, without changing any state
+        if self.size == 0:
+            return -1
+
+        if auto and self.mode == self.CurrentItemInLoop and self.current >= 0:
+            return self.current
+
+        for index in self.queue:
+            if index < self.size:
+                return index
+
+        wrap = self.mode != self.Sequential or not auto
+        if self.shuffle.enabled:
+            return self.shuffle.next(self.current, wrap)
+
+        if self.current + 1 < self.size:
+            return self.current + 1
+
+        return 0 if wrap else -1
+
+    def upcoming(self, count):
+        # the indexes the next count calls of next() would visit, queue first
+        indexes = []
+        cursor = self.current
+        for index in self.queue:
+            if len(indexes) >= count:
+                return indexes
+            if index < self.size:
+                indexes.append(index)
+                cursor = index
+
+        wrap = self.mode != self.Sequential
+        seen = set(indexes)
+        while len(indexes) < count:
+            if self.shuffle.enabled:
+                cursor = self.shuffle.next(cursor, wrap)
+
+            elif cursor + 1 < self.size:
+                cursor += 1
+
+            else:
+                cursor = 0 if wrap and self.size else -1
+
+            if cursor < 0 or cursor in seen or cursor == self.current:
+                break
+            seen.add(cursor)
+            indexes.append(cursor)
+
+        return indexes
+
+    def next(self, auto=False):
+        index = self.peekNext(auto)
+        if index < 0:
+            return -1
+
+        if not (auto and self.mode == self.CurrentItemInLoop and self.current >= 0):
+            # drop stale entries up to and including the queued index that was used
+            while self.queue and self.queue.popleft() >= self.size:
+                pass
+
+        return self.setCurrent(index)
+
+    def previous(self):
+        if self.size == 0:
+            return -1
+
+        while self.history:
+            index = self.history.pop()
+            if index < self.size:
+                self.current = index
+                return index
+
+        if self.shuffle.enabled:
+            index = self.shuffle.previous(self.current, True)
+
+        else:
+            index = self.current - 1 if self.current > 0 else self.size - 1
+
+        self.current = index
+        return index
@@ -0,0 +1,90 @@
+import os
+import queue
+from collections import OrderedDict
+from PyQt5.QtCore import QThread, pyqtSignal
+
+
+class Prefetcher(QThread):
+
+    prefetched = pyqtSignal(int)
+
+    def __init__(self, budget=64 * 1024 * 1024, chunkSize=1024 * 1024, parent=None):
+        super().__init__(parent)
+        self.budget = budget
+        self.chunkSize = chunkSize
+        self.jobs = queue.Queue()
+        # recently warmed files, keyed by path with their (size, mtime)
+        self.warmed = OrderedDict()
+        # paths whose error was printed already, every track change prefetches the same ones again
+        self.failed = set()
+
+    def prefetch(self, paths):
+        # a new list supersedes the one being read
+        self.jobs.put(list(paths))
+
+    def stop(self):
+        self.jobs.put(None)
+        self.wait()
+
+    def run(self):
+        buffer = bytearray(self.chunkSize)
+        while True:
+            paths = self.jobs.get()
+            while paths is not None and not self.jobs.empty():
+                paths = self.jobs.get_nowait()
+
+            if paths is None:
+                break
+
+            self.prefetched.emit(self.__warm(paths, buffer))
+
+    def __warm(self, paths, buffer):
+        budget = self.budget
+        total = 0
+        for path in paths:
+            if budget <= 0 or not self.jobs.empty():
+                break
+
+            try:
+                stat = os.stat(path)
+                if self.warmed.get(path) == (stat.st_size, stat.st_mtime_ns):
+                    # most likely still in the page cache
+                    self.warmed.move_to_end(path)
+                    budget -= stat.st_size
+                    continue
+
+                read = self.__warmFile(path, min(stat.st_size, budget), buffer)
+
+            except FileNotFoundError:
+                continue
+
+            except OSError as err:
+                if path not in self.failed:
+                    self.failed.add(path)
+                    print(err)
+                continue
+
+            budget -= read
+            total += read
+            if read >= stat.st_size:
+                self.warmed[path] = (stat.st_size, stat.st_mtime_ns)
+                if len(self.warmed) > 64:
+                    self.warmed.popitem(last=False)
+
+        return total
+
+    def __warmFile(self, path, limit, buffer):
+        read = 0
+        with open(path, "rb", buffering=0) as file:
+            if hasattr(os, "posix_fadvise"):
+                os.posix_fadvise(file.fileno(), 0, limit, os.POSIX_FADV_WILLNEED)
+
+            # a plain sequential read also warms network mounts that ignore the hint
+            view = memoryview(buffer)
+            while read < limit and self.jobs.empty():
+                count = file.readinto(view[:min(self.chunkSize, limit - read)])
+                if not count:
+                    break
+                read += count
+
+        return read
@@ -0,0 +1,289 @@
+import mmap
+import struct
+
+
+MPEG_BITRATES = {
+    (1, 1): (0, 32, 64, 96, 128, 160, 192, 224, 256, 288, 320, 352, 384, 416, 448),
+    (1, 2): (0, 32, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320, 384),
+    (1, 3): (0, 32, 40, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320),
+    (2, 1): (0, 32, 48, 56, 64, 80, 96, 112, 128, 144, 160, 176, 192, 224, 256),
+    (2, 2): (0, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160),
+    (2, 3): (0, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160),
+}
+
+MPEG_SAMPLE_RATES = {
+    1: (44100, 48000, 32000),
+    2: (22050, 24000, 16000),
+    2.5: (11025, 12000, 8000),
+}
+
+
+class ProbeResult:
+
+    __slots__ = ("duration", "sampleRate", "bitrate", "codec")
+
+    def __init__(self, duration, sampleRate, bitrate, codec):
+        self.duration = duration
+        self.sampleRate = sampleRate
+        self.bitrate = bitrate
+        self.codec = codec
+
+
+def probe(path):
+    try:
+        with open(path, "rb") as file, mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as data:
+            return probeData(data)
+
+    except (OSError, ValueError, IndexError, struct.error):
+        return None
+
+
+def isAudioFile(path):
+    try:
+        with open(path, "rb") as file:
+            header = file.read(12)
+
+    except OSError:
+        return False
+
+    return isAudioHeader(header)
+
+
+def isAudioHeader(header):
+    # id3 tagged mp3, flac, ogg and asf (wma)
+    if header[:3] == b"ID3" or header[:4] in (b"fLaC", b"OggS", b"\x30\x26\xb2\x75"):
+        return True
+
+    if header[:4] == b"RIFF" and header[8:12] == b"WAVE":
+        return True
+
+    if header[4:8] == b"ftyp":
+        return True
+
+    # bare MPEG audio or ADTS frame sync
+    return len(header) >= 2 and header[0] == 0xff and header[1] & 0xe0 == 0xe0
+
+
+def probeData(data):
+    if data[:4] == b"RIFF" and data[8:12] == b"WAVE":
+        return probeWav(data)
+
+    if data[:4] == b"OggS":
+        return probeOgg(data)
+
+    if data[4:8] == b"ftyp":
+        return probeMp4(data)
+
+    start = id3Size(data)
+    if data[start:start + 4] == b"fLaC":
+        return probeFlac(data, start)
+
+    return probeMp3(data, start)
+
+
+def result(duration, sampleRate, size, codec):
+    if not duration or duration <= 0:
+        return None
+
+    return ProbeResult(int(duration * 1000), sampleRate, int(size * 8 / duration), codec)
+
+
+def id3Size(data):
+    if data[:3] != b"ID3" or len(data) < 10:
+        return 0
+
+    size = (data[6] & 0x7f) << 21 | (data[7] & 0x7f) << 14 | (data[8] & 0x7f) << 7 | (data[9] & 0x7f)
+    return size + (20 if data[5] & 0x10 else 10)
+
+
+def probeWav(data):
+    position = 12
+    byteRate = sampleRate = None
+    while position + 8 <= len(data):
+        chunk, size = struct.unpack_from("<4sI", data, position)
+        if chunk == b"fmt ":
+            _, _, sampleRate, byteRate = struct.unpack_from("<HHII", data, position + 8)
+
+        elif chunk == b"data":
+            if not byteRate:
+                return None
+            size = min(size, len(data) - position - 8)
+            return ProbeResult(int(size * 1000 / byteRate), sampleRate, byteRate * 8, "wav")
+
+        position += 8 + size + (size & 1)
+
+    return None
+
+
+def probeFlac(data, start):
+    # the first metadata block is always STREAMINFO
+    info = start + 8
+    sampleRate = data[info + 10] << 12 | data[info + 11] << 4 | data[info + 12] >> 4
+    samples = (data[info + 13] & 0x0f) << 32 | struct.unpack_from(">I", data, info + 14)[0]
+    if not sampleRate:
+        return None
+
+    return result(samples / sampleRate, sampleRate, len(data) - start, "flac")
+
+
+def probeOgg(data):
+    segments = data[26]
+    packet = 27 + segments
+    if data[packet:packet + 7] == b"\x01vorbis":
+        sampleRate = struct.unpack_from("<I", data, packet + 12)[0]
+        preSkip = 0
+        codec = "vorbis"
+
+    elif data[packet:packet + 8] == b"OpusHead":
+        sampleRate = 48000
+        preSkip = struct.unpack_from("<H", data, packet + 10)[0]
+        codec = "opus"
+
+    else:
+        return None
+
+    # the last page carries the granule position (total samples) of the stream
+    last = data.rfind(b"OggS", max(0, len(data) - 65536 * 2))
+    if last < 0 or not sampleRate:
+        return None
+
+    granule = struct.unpack_from("<q", data, last + 6)[0]
+    return result((granule - preSkip) / sampleRate, sampleRate, len(data), codec)
+
+
+def probeMp4(data):
+    moov = findAtom(data, 0, len(data), b"moov")
+    if moov is None:
+        return None
+
+    start, end = moov
+    mvhd = findAtom(data, start, end, b"mvhd")
+    if mvhd is None:
+        return None
+
+    position = mvhd[0]
+    if data[position] == 1:
+        timescale, duration = struct.unpack_from(">IQ", data, position + 20)
+
+    else:
+        timescale, duration = struct.unpack_from(">II", data, position + 12)
+
+    sampleRate = None
+    trak = findAtom(data, start, end, b"trak")
+    mdia = trak and findAtom(data, trak[0], trak[1], b"mdia")
+    mdhd = mdia and findAtom(data, mdia[0], mdia[1], b"mdhd")
+    if mdhd:
+        offset = 20 if data[mdhd[0]] == 1 else 12
+        sampleRate = struct.unpack_from(">I", data, mdhd[0] + offset)[0]
+
+    if not timescale:
+        return None
+
+    return result(duration / timescale, sampleRate, len(data), "mp4")
+
+
+def findAtom(data, start, end, name):
+    position = start
+    while position + 8 <= end:
+        size, atom = struct.unpack_from(">I4s", data, position)
+        header = 8
+        if size == 1:
+            size = struct.unpack_from(">Q", data, position + 8)[0]
+            header = 16
+
+        elif size == 0:
+            size = end - position
+
+        if size < header:
+            return None
+
+        if atom == name:
+            return position + header, min(position + size, end)
+
+        position += size
+
+    return None
+
+
+def probeMp3(data, start):
+    position = data.find(b"\xff", start, start + 65536)
+    while 0 <= position < len(data) - 4:
+        header = struct.unpack_from(">I", data, position)[0]
+        if header & 0xffe00000 == 0xffe00000:
+            frame = mpegFrame(header)
+            if frame:
+                return mp3Duration(data, position, frame)
+
+        position = data.find(b"\xff", position + 1, start + 65536)
+
+    return None
+
+
+def mpegFrame(header):
+    version = {0: 2.5, 2: 2, 3: 1}.get(header >> 19 & 3)
+    layer = {1: 3, 2: 2, 3: 1}.get(header >> 17 & 3)
+    bitrateIndex = header >> 12 & 0xf
+    sampleRateIndex = header >> 10 & 3
+    if version is None or layer is None or bitrateIndex in (0, 15) or sampleRateIndex == 3:
+        return None
+
+    bitrate = MPEG_BITRATES[(1 if version == 1 else 2, layer)][bitrateIndex] * 1000
+    sampleRate = MPEG_SAMPLE_RATES[version][sampleRateIndex]
+    if layer == 1:
+        samples = 384
+
+    elif layer == 3 and version != 1:
+        samples = 576
+
+    else:
+        samples = 1152
+
+    mono = header >> 6 & 3 == 3
+    return version, bitrate, sampleRate, samples, mono
+
+
+def mp3Duration(data, position, frame):
+    version, bitrate, sampleRate, samples, mono = frame
+    if version == 1:
+        sideInfo = 17 if mono else 32
+
+    else:
+        sideInfo = 9 if mono else 17
+
+    audioSize = len(data) - position
+    if data[-128:-125] == b"TAG":
+        audioSize -= 128
+
+    xing = position + 4 + sideInfo
+    if data[xing:xing + 4] in (b"Xing", b"Info"):
+        flags = struct.unpack_from(">I", data, xing + 4)[0]
+        offset = xing + 8
+        frames = None
+        if flags & 1:
+            frames = struct.unpack_from(">I", data, offset)[0]
+            offset += 4
+        if flags & 2:
+            audioSize = struct.unpack_from(">I", data, offset)[0] or audioSize
+            offset += 4
+        if flags & 4:
+            offset += 100
+        if flags & 8:
+            offset += 4
+
+        if frames:
+            total = frames * samples
+            if data[offset:offset + 4] in (b"LAME", b"Lavf", b"Lavc"):
+                # encoder delay and padding, 12 bits each
+                delay = data[offset + 21] << 4 | data[offset + 22] >> 4
+                padding = (data[offset + 22] & 0x0f) << 8 | data[offset + 23]
+                total = max(0, total - delay - padding)
+
+            return result(total / sampleRate, sampleRate, audioSize, "mp3")
+
+    vbri = position + 4 + 32
+    if data[vbri:vbri + 4] == b"VBRI":
+        audioSize, frames = struct.unpack_from(">II", data, vbri + 10)
+        return result(frames * samples / sampleRate, sampleRate, audioSize, "mp3")
+
+    # constant bitrate stream without a VBR header
+    return ProbeResult(int(audioSize * 8000 / bitrate), sampleRate, bitrate, "mp3")
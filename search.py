@@ -0,0 +1,229 @@
+import re
+from array import array
+from bisect import bisect_left, insort
+from collections import deque
+
+
+WORD = re.compile(r"\w+")
+
+
+def searchWords(text):
+    return WORD.findall(text.casefold()) if text else []
+
+
+def shortPrefixesOf(words):
+    return {word[:1] for word in words} | {word[:2] for word in words}
+
+
+def addPosting(postings, id):
+    # postings stay ascending, ids indexed again land in the middle
+    if not postings or postings[-1] < id:
+        postings.append(id)
+    else:
+        insort(postings, id)
+
+
+def removePosting(postings, id):
+    index = bisect_left(postings, id)
+    if index < len(postings) and postings[index] == id:
+        del postings[index]
+
+
+def searchText(track):
+    words = []
+    for field in (track.name, track.title, track.artist, track.album):
+        words.extend(searchWords(field))
+
+    # the leading space lets a query word match word prefixes with a plain substring test
+    return " " + " ".join(words)
+
+
+class SearchIndex:
+    def __init__(self):
+        self.tracks = []
+        # the index works on ids given in insertion order, so reordering the playlist only
+        # rewrites the id <-> row arrays
+        self.texts = []
+        self.rowOf = array("I")
+        self.idOf = array("I")
+        self.permuted = False
+        # word -> ids containing it, first three letters -> words -> their ids and one or two
+        # letter prefixes -> ids, all ascending and exact, a track indexed again is moved
+        # between the postings of the words it gained and lost
+        self.words = {}
+        self.prefixes = {}
+        self.shortPrefixes = {}
+        self.pending = deque()
+        self.last = None
+
+    def reset(self, tracks):
+        self.tracks = tracks
+        self.texts = [None] * len(tracks)
+        self.rowOf = array("I", range(len(tracks)))
+        self.idOf = array("I", range(len(tracks)))
+        self.permuted = False
+        self.words = {}
+        self.prefixes = {}
+        self.shortPrefixes = {}
+        self.pending = deque([range(len(tracks))]) if tracks else deque()
+        self.last = None
+
+    def insert(self, start, stop):
+        # rows are only ever appended
+        ids = range(len(self.texts), len(self.texts) + stop - start)
+        self.texts.extend([None] * len(ids))
+        self.rowOf.extend(range(start, stop))
+        self.idOf.extend(ids)
+        self.pending.append(ids)
+        self.last = None
+
+    def update(self, start, stop):
+        self.pending.append(self.idOf[start:stop])
+        self.last = None
+
+    def permute(self, mapping):
+        # mapping is old row -> new row
+        rowOf = array("I", (mapping[row] for row in self.rowOf))
+        idOf = array("I", [0]) * len(rowOf)
+        for id, row in enumerate(rowOf):
+            idOf[row] = id
+
+        self.rowOf = rowOf
+        self.idOf = idOf
+        self.permuted = True
+        if self.last is not None:
+            self.last = (self.last[0], sorted(mapping[row] for row in self.last[1]))
+
+    def indexPending(self, limit=None):
+        # indexes up to limit tracks, all of them when limit is None
+        words = self.words
+        prefixes = self.prefixes
+        shortPrefixes = self.shortPrefixes
+        while self.pending and (limit is None or limit > 0):
+            ids = self.pending.popleft()
+            if limit is not None and len(ids) > limit:
+                self.pending.appendleft(ids[limit:])
+                ids = ids[:limit]
+
+            for id in ids:
+                text = searchText(self.tracks[self.rowOf[id]])
+                old = self.texts[id]
+                if text == old:
+                    continue
+
+                self.texts[id] = text
+                idWords = set(text.split())
+                oldWords = set(old.split()) if old is not None else set()
+                idPrefixes = shortPrefixesOf(idWords)
+                oldPrefixes = shortPrefixesOf(oldWords)
+                for prefix in oldPrefixes - idPrefixes:
+                    removePosting(shortPrefixes[prefix], id)
+                    if not shortPrefixes[prefix]:
+                        del shortPrefixes[prefix]
+
+                for prefix in idPrefixes - oldPrefixes:
+                    postings = shortPrefixes.get(prefix)
+                    if postings is None:
+                        postings = shortPrefixes[prefix] = array("I")
+                    addPosting(postings, id)
+
+                for word in oldWords - idWords:
+                    if len(word) < 3:
+                        continue
+
+                    removePosting(words[word], id)
+                    if not words[word]:
+                        del words[word]
+                        del prefixes[word[:3]][word]
+
+                for word in idWords - oldWords:
+                    if len(word) < 3:
+                        continue
+
+                    postings = words.get(word)
+                    if postings is None:
+                        postings = words[word] = array("I")
+                        prefixes.setdefault(word[:3], {})[word] = postings
+                    addPosting(postings, id)
+
+            if limit is not None:
+                limit -= len(ids)
+
+        return bool(self.pending)
+
+    def search(self, query):
+        # rows where every query word starts a word of the name or tags, None for an empty query
+        words = searchWords(query)
+        if not words:
+            self.last = None
+            return None
+
+        self.indexPending()
+        if len(words) == 1 and len(words[0]) < 3:
+            # short prefix postings are exact
+            rows = self.__rows(self.shortPrefixes.get(words[0], ()))
+
+        else:
+            # the candidates come from the postings of the word with the fewest ids
+            postings = {word: self.__postings(word) for word in set(words)}
+            sizes = {word: sum(len(ids) for ids in postings[word]) for word in postings}
+            word = min(sizes, key=sizes.get)
+            if self.last is not None and self.__narrows(self.last[0], words) and len(self.last[1]) < sizes[word]:
+                # the query only grew since the last keystroke, so its result is a superset that
+                # already matches the unchanged words
+                previous = self.last[0]
+                start = len(previous) if words[len(previous) - 1] == previous[-1] else len(previous) - 1
+                rows = self.matches(self.last[1], words[start:])
+
+            else:
+                # postings are exact for their own word, only the others are checked
+                others = [other for other in words if other != word]
+                rows = self.__rows(self.__filter(self.__merge(postings[word]), others))
+
+        self.last = (words, rows)
+        return rows
+
+    def matches(self, rows, words):
+        # the given ascending rows that match every word
+        idOf = self.idOf
+        texts = self.texts
+        for word in sorted(set(words), key=len, reverse=True):
+            needle = " " + word
+            rows = [row for row in rows if needle in texts[idOf[row]]]
+
+        return rows
+
+    def __filter(self, ids, words):
+        texts = self.texts
+        # one pass per word, the longest (usually rarest) word first
+        for word in sorted(set(words), key=len, reverse=True):
+            needle = " " + word
+            ids = [id for id in ids if needle in texts[id]]
+
+        return ids
+
+    def __rows(self, ids):
+        return sorted(map(self.rowOf.__getitem__, ids)) if self.permuted else list(ids)
+
+    def __postings(self, word):
+        # the postings of every indexed word the given word is a prefix of
+        if len(word) < 3:
+            return [self.shortPrefixes.get(word, array("I"))]
+
+        matches = self.prefixes.get(word[:3], {})
+        if len(word) == 3:
+            return list(matches.values())
+
+        return [ids for match, ids in matches.items() if match.startswith(word)]
+
+    def __merge(self, postings):
+        if len(postings) == 1:
+            return postings[0]
+
+        # a track with two words of the prefix is in both postings
+        return sorted(set().union(*postings))
+
+    def __narrows(self, previous, words):
+        count = len(previous)
+        return (len(words) >= count and words[:count - 1] == previous[:-1]
+                and words[count - 1].startswith(previous[-1]))
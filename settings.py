@@ -1,5 +1,146 @@
-from PyQt5.QtCore import QSettings
+import json
+import os
+import threading
+from PyQt5.QtCore import QObject, QSettings, QStandardPaths, pyqtSignal
+from persistence import writeAtomic
+
+
+DEFAULTS = {
+    "volume": 100,
+    "currentMusic": 0,
+    "playbackMode": 2,
+    "shuffle": False,
+    "skipDuplicates": False,
+    "gapless": True,
+    "crossfade": 0,
+    "prefetchTracks": 3,
+    "prefetchBudget": 64 * 1024 * 1024,
+    "resumeMinDuration": 600,
+}
+
+
+class Settings(QObject):
+
+    changed = pyqtSignal(str)
+
+    def __init__(self, path, parent=None):
+        super().__init__(parent)
+        self.path = path
+        self.lock = threading.Lock()
+        self.dirty = False
+        self.values = self.__load()
+
+    def value(self, key, default=None):
+        with self.lock:
+            return self.values.get(key, DEFAULTS.get(key) if default is None else default)
+
+    def setValue(self, key, value):
+        with self.lock:
+            if self.values.get(key) == value:
+                return
+
+            self.values[key] = value
+            self.dirty = True
+
+        self.changed.emit(key)
+
+    def volume(self):
+        return int(self.value("volume"))
+
+    def setVolume(self, volume):
+        self.setValue("volume", int(volume))
+
+    def currentMusic(self):
+        return int(self.value("currentMusic"))
+
+    def setCurrentMusic(self, index):
+        self.setValue("currentMusic", int(index))
+
+    def playbackMode(self):
+        return int(self.value("playbackMode"))
+
+    def setPlaybackMode(self, mode):
+        self.setValue("playbackMode", int(mode))
+
+    def shuffle(self):
+        return self.value("shuffle") in (True, "true")
+
+    def setShuffle(self, shuffle):
+        self.setValue("shuffle", bool(shuffle))
+
+    def skipDuplicates(self):
+        return self.value("skipDuplicates") in (True, "true")
+
+    def setSkipDuplicates(self, skip):
+        self.setValue("skipDuplicates", bool(skip))
+
+    def gapless(self):
+        return self.value("gapless") in (True, "true")
+
+    def setGapless(self, gapless):
+        self.setValue("gapless", bool(gapless))
+
+    def crossfade(self):
+        return int(self.value("crossfade"))
+
+    def setCrossfade(self, seconds):
+        self.setValue("crossfade", int(seconds))
+
+    def prefetchTracks(self):
+        return int(self.value("prefetchTracks"))
+
+    def prefetchBudget(self):
+        return int(self.value("prefetchBudget"))
+
+    def resumeMinDuration(self):
+        # in seconds, shorter tracks always start from the beginning
+        return int(self.value("resumeMinDuration"))
+
+    def takeSnapshot(self):
+        with self.lock:
+            if not self.dirty:
+                return None
+
+            self.dirty = False
+            return json.dumps(self.values, indent=1).encode("utf-8")
+
+    def sync(self):
+        data = self.takeSnapshot()
+        if data is not None:
+            writeAtomic(self.path, data)
+
+    def __load(self):
+        try:
+            with open(self.path, encoding="utf-8") as file:
+                return json.load(file)
+
+        except (OSError, ValueError):
+            pass
+
+        # migrate from the old iplayer.ini in the working directory
+        values = {}
+        legacy = QSettings("iplayer.ini", QSettings.IniFormat)
+        for key in legacy.allKeys():
+            values[key] = legacy.value(key)
+
+        if values:
+            self.dirty = True
+
+        return values
+
+
+_settings = None
+
+
+def settingsPath():
+    path = QStandardPaths.writableLocation(QStandardPaths.GenericConfigLocation) + "/iplayer"
+    os.makedirs(path, exist_ok=True)
+    return path + "/iplayer.json"
 
 
 def settings():
-    return QSettings("iplayer.ini", QSettings.IniFormat)
\ No newline at end of file
+    global _settings
+    if _settings is None:
+        _settings = Settings(settingsPath())
+
+    return _settings
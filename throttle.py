@@ -0,0 +1,42 @@
+from PyQt5.QtCore import QObject, QTimer, Qt
+
+
+class Throttle(QObject):
+    # calls function with the latest requested value, at most once per interval and never
+    # while a previous call is still in flight; the last value always gets through
+    def __init__(self, function, interval, parent=None):
+        super().__init__(parent)
+        self.function = function
+        self.pending = None
+        self.hasPending = False
+        self.inFlight = None
+
+        self.timer = QTimer(self)
+        self.timer.setSingleShot(True)
+        self.timer.setInterval(interval)
+        self.timer.setTimerType(Qt.PreciseTimer)
+        self.timer.timeout.connect(self.release)
+
+    def request(self, value):
+        self.pending = value
+        self.hasPending = True
+        if not self.timer.isActive():
+            self.__call()
+
+    def release(self):
+        # ends the call in flight early, the timer interval is the fallback
+        self.timer.stop()
+        self.inFlight = None
+        if self.hasPending:
+            self.__call()
+
+    def isActive(self):
+        return self.timer.isActive() or self.hasPending
+
+    def __call(self):
+        value = self.pending
+        self.pending = None
+        self.hasPending = False
+        self.inFlight = value
+        self.timer.start()
+        self.function(value)
@@ -0,0 +1,26 @@
+import time
+from PyQt5.QtCore import QObject, QAbstractEventDispatcher
+
+
+class WakeupCounter(QObject):
+    # counts how often the event loop of the calling thread wakes up
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.dispatcher = QAbstractEventDispatcher.instance()
+        self.count = 0
+        self.started = time.perf_counter()
+        self.dispatcher.awake.connect(self.__awake)
+
+    def restart(self):
+        # wakeups per second since the last restart
+        now = time.perf_counter()
+        rate = self.count / (now - self.started) if now > self.started else 0.0
+        self.count = 0
+        self.started = now
+        return rate
+
+    def stop(self):
+        self.dispatcher.awake.disconnect(self.__awake)
+
+    def __awake(self):
+        self.count += 1